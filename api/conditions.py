@@ -0,0 +1,78 @@
+import hashlib
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from api.filters import PetFilter
+from web.models import Country, Pet, PetChange, Region
+
+Validators = Tuple[Optional[str], Optional[datetime]]
+
+
+def _etag(request, *parts) -> str:
+    # Deploys can change serialized responses without any data changes, and the same data is rendered as JSON or
+    # MessagePack depending on Accept header
+    parts = (settings.GIT_COMMIT, request.GET.urlencode(), request.META.get('HTTP_ACCEPT', '')) + parts
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _latest(*dates: Optional[datetime]) -> Optional[datetime]:
+    return max(filter(None, dates), default=None)
+
+
+def _request_validators(request, compute: Callable[..., Validators]) -> Validators:
+    # Django's condition decorator asks for ETag and Last-Modified separately, aggregates run once per request
+    if not hasattr(request, '_conditional_validators'):
+        request._conditional_validators = compute(request)
+
+    return request._conditional_validators
+
+
+def _pets_validators(request) -> Validators:
+    filterset = PetFilter(request.GET, queryset=Pet.objects.order_by())
+    if not filterset.is_valid():
+        return None, None
+
+    # Count changes when filtered pets are deleted, maximum update times would not. Property and photo changes
+    # update pets updated_at, nested region and country are checked by their own update times.
+    pets = filterset.qs.aggregate(
+        updated_at=Max('updated_at'),
+        shelter_updated_at=Max('shelter__updated_at'),
+        region_updated_at=Max('shelter__region__updated_at'),
+        country_updated_at=Max('shelter__region__country__updated_at'),
+        count=Count('id'),
+    )
+    # Deleted or unpublished pets are not among filtered pets anymore, their removal is in pet changes feed
+    changed_at = PetChange.objects.order_by('-created_at').values_list('created_at', flat=True).first()
+    updated_at = (
+        pets['updated_at'], pets['shelter_updated_at'], pets['region_updated_at'], pets['country_updated_at'],
+        changed_at,
+    )
+
+    return _etag(request, *updated_at, pets['count']), _latest(*updated_at)
+
+
+def _countries_validators(request) -> Validators:
+    countries = Country.objects.order_by().aggregate(updated_at=Max('updated_at'), count=Count('id'))
+    regions = Region.objects.order_by().aggregate(updated_at=Max('updated_at'), count=Count('id'))
+
+    etag = _etag(request, countries['updated_at'], countries['count'], regions['updated_at'], regions['count'])
+    return etag, _latest(countries['updated_at'], regions['updated_at'])
+
+
+def pets_etag(request, *args, **kwargs) -> Optional[str]:
+    return _request_validators(request, _pets_validators)[0]
+
+
+def pets_last_modified(request, *args, **kwargs) -> Optional[datetime]:
+    return _request_validators(request, _pets_validators)[1]
+
+
+def countries_etag(request, *args, **kwargs) -> Optional[str]:
+    return _request_validators(request, _countries_validators)[0]
+
+
+def countries_last_modified(request, *args, **kwargs) -> Optional[datetime]:
+    return _request_validators(request, _countries_validators)[1]
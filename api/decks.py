@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import uuid
+from typing import List, Optional
+
+from django.core.cache import cache
+
+from web.models import PetType
+
+
+class PetDeck:
+    """Generated pets order kept in cache, so the next deck slice is returned without generating pets again."""
+    CACHE_KEY_PREFIX = 'pet-deck'
+    CACHE_TIMEOUT = 10 * 60
+
+    def __init__(self, pet_type: PetType, pet_ids: List[int], cursor: Optional[str] = None):
+        self.pet_type = pet_type
+        self.pet_ids = pet_ids
+        self.cursor = cursor or uuid.uuid4().hex
+
+    @classmethod
+    def _cache_key(cls, cursor: str) -> str:
+        return f"{cls.CACHE_KEY_PREFIX}:{cursor}"
+
+    @classmethod
+    def load(cls, cursor: str, pet_type: PetType) -> Optional[PetDeck]:
+        data = cache.get(cls._cache_key(cursor))
+
+        if data is None or data['pet_type'] != pet_type.value:
+            return None
+
+        return cls(pet_type=pet_type, pet_ids=data['pet_ids'], cursor=cursor)
+
+    def pop(self, limit: int) -> List[int]:
+        pet_ids, self.pet_ids = self.pet_ids[:limit], self.pet_ids[limit:]
+
+        return pet_ids
+
+    def save(self) -> Optional[str]:
+        if not self.pet_ids:
+            cache.delete(self._cache_key(self.cursor))
+            return None
+
+        cache.set(self._cache_key(self.cursor), {
+            'pet_type': self.pet_type.value,
+            'pet_ids': self.pet_ids,
+        }, self.CACHE_TIMEOUT)
+
+        return self.cursor
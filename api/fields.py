@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from api.utils import decode_id_set, encode_id_set
+
 
 class EnumField(serializers.ChoiceField):
     def __init__(self, enum, **kwargs):
@@ -17,3 +19,21 @@ class EnumField(serializers.ChoiceField):
             return self.enum[data]
         except KeyError:
             self.fail('invalid_choice', input=data)
+
+
+class EncodedIdSetField(serializers.Field):
+    default_error_messages = {
+        'invalid': 'Not a valid encoded id set.',
+    }
+
+    def to_representation(self, value):
+        return encode_id_set(value)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+
+        try:
+            return decode_id_set(data)
+        except ValueError:
+            self.fail('invalid')
@@ -1,14 +1,128 @@
+import random
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import cached_property
+from drf_yasg import openapi
 from ipware import get_client_ip
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from rest_framework_tracking.mixins import LoggingMixin
 
+from web.request_logs import APIRequestLogBuffer
+
+
+class VaryOnAcceptMixin:
+    # The same data is rendered as JSON or MessagePack depending on Accept header, shared caches have to key by it
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ('Accept',))
+
+        return response
+
 
 class ApiLoggingMixin(LoggingMixin):
+    # Share of successful requests which are logged, errors and slow requests are always logged
+    logging_sample_rate = 1.0
+
+    def should_log(self, request, response):
+        if not super().should_log(request, response):
+            return False
+
+        return response.status_code >= 400 \
+            or self._get_response_ms() >= settings.API_LOGGING_SLOW_REQUEST_MS \
+            or random.random() < self.logging_sample_rate
+
     def handle_log(self):
         self.log['response'] = None
 
-        super().handle_log()
+        if settings.API_LOGGING_BUFFERED:
+            APIRequestLogBuffer.append(self.log)
+        else:
+            super().handle_log()
 
     def _get_ip_address(self, request):
         client_ip, _ = get_client_ip(request)
 
         return client_ip
+
+
+class SparseFieldsMixin:
+    """Limits serialized pet fields to the ones listed in fields query parameter, e.g. ?fields=id,name,photo.
+
+    Selected fields are passed in serializer context, serializers read and return only them. Pet id and type are
+    always returned, responses are keyed and split by them.
+    """
+    fields_query_param = 'fields'
+    required_fields = ('id', 'pet_type')
+    fields_parameter = openapi.Parameter(
+        'fields',
+        openapi.IN_QUERY,
+        description="Comma separated pet fields to return, all fields by default. Id and pet_type are always returned.",
+        type=openapi.TYPE_STRING,
+    )
+
+    @cached_property
+    def selected_fields(self) -> Optional[List[str]]:
+        value = self.request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+
+        fields = set(value.split(','))
+        allowed_fields = self.serializer_class.Meta.fields
+
+        unknown_fields = fields.difference(allowed_fields)
+        if unknown_fields:
+            raise ValidationError({self.fields_query_param: [f"Unknown fields: {', '.join(sorted(unknown_fields))}"]})
+
+        fields.update(self.required_fields)
+
+        return [field for field in allowed_fields if field in fields]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.selected_fields
+
+        return context
+
+
+class NormalizedSheltersMixin:
+    """Opt-in response shape selected by normalized query parameter, where pets carry shelter_id instead of the
+    shelter object and every shelter is returned once in shelters map keyed by id."""
+    normalized_query_param = 'normalized'
+    normalized_parameter = openapi.Parameter(
+        'normalized',
+        openapi.IN_QUERY,
+        description="Return shelter_id for every pet and each shelter once in shelters map.",
+        type=openapi.TYPE_BOOLEAN,
+    )
+
+    @cached_property
+    def normalized(self) -> bool:
+        value = self.request.query_params.get(self.normalized_query_param)
+        if value is None:
+            return False
+
+        try:
+            return serializers.BooleanField().to_internal_value(value)
+        except ValidationError as e:
+            raise ValidationError({self.normalized_query_param: e.detail})
+
+    @staticmethod
+    def normalize_shelters(pets: List[dict]) -> Tuple[List[dict], Dict[str, dict]]:
+        shelters = {}
+        normalized_pets = []
+
+        for pet in pets:
+            normalized_pet = {}
+            for key, value in pet.items():
+                if key == 'shelter':
+                    shelters[str(value['id'])] = value
+                    normalized_pet['shelter_id'] = value['id']
+                else:
+                    normalized_pet[key] = value
+
+            normalized_pets.append(normalized_pet)
+
+        return normalized_pets, shelters
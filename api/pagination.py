@@ -0,0 +1,111 @@
+from collections import OrderedDict
+
+import coreapi
+import coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page number pagination, or keyset pagination when cursor query parameter is given (empty for the first page).
+
+    Keyset pages of queryset ordered by descending primary key seek from the last id of the previous page and are not
+    counted, so deep pages cost the same as the first one. Rows are model instances or values_list rows starting
+    with primary key. Without page_number_fallback keyset pagination is used for all requests.
+    """
+    cursor_query_param = 'cursor'
+    cursor_query_description = "Keyset pagination cursor returned in next link. Empty value returns the first page."
+    invalid_cursor_message = "Invalid cursor"
+    min_cursor = 1
+    max_cursor = 2 ** 31 - 1
+    page_number_fallback = True
+
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_number_fallback and self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = True
+        self.request = request
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(pk__lt=self._parse_cursor(cursor))
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+
+        return self.page
+
+    def _parse_cursor(self, cursor: str) -> int:
+        # Out of integer primary key range values would fail in the database instead of returning 404
+        try:
+            value = int(cursor)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if not self.min_cursor <= value <= self.max_cursor:
+            raise NotFound(self.invalid_cursor_message)
+
+        return value
+
+    @staticmethod
+    def _row_pk(row) -> int:
+        return row.pk if hasattr(row, 'pk') else row[0]
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+
+        if not self.has_next:
+            return None
+
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param,
+                                   self._row_pk(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_schema_fields(self, view):
+        fields = super().get_schema_fields(view) if self.page_number_fallback else []
+
+        return fields + [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.String(title="Cursor", description=self.cursor_query_description),
+            )
+        ]
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view) if self.page_number_fallback else []
+
+        return parameters + [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.cursor_query_description,
+                'schema': {
+                    'type': 'string',
+                },
+            },
+        ]
+
+
+class FavoritePetsPagination(KeysetPagination):
+    page_size = 100
+    page_number_fallback = False
@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Tuple, Type
+
+from django.core.cache import cache
+from rest_framework.serializers import Serializer
+
+from api.serializers import PetValuesSerializer
+from web.models import Cat, Dog, Pet, PetQuerySet
+
+# Pet id and update times of pet, its shelter, region and country
+PetVersion = Tuple[int, datetime, datetime, datetime, datetime]
+
+
+class PetPayloadCache:
+    """Serialized pets kept in cache by pet and its shelter update time, so only changed pets are serialized again.
+
+    With values_serialization missing pets are serialized by PetValuesSerializer, which gives the same
+    representation as serializer_class without loading model instances.
+    """
+    CACHE_KEY_PREFIX = 'pet-payload'
+    CACHE_TIMEOUT = 24 * 60 * 60
+
+    def __init__(self, serializer_class: Type[Serializer], context: dict, values_serialization: bool = False):
+        self.serializer_class = serializer_class
+        self.context = context
+        self.values_serialization = values_serialization
+
+        request = context.get('request')
+        self._origin = request.build_absolute_uri('/') if request else ''
+        self._fields = ','.join(context.get('fields') or ())
+
+    def _cache_key(self, pet_id: int, *updated_at: datetime) -> str:
+        # Payload embeds shelter with its region and country, changes of any of them change the key
+        update_times = ':'.join(str(value.timestamp()) for value in updated_at)
+
+        return f"{self.CACHE_KEY_PREFIX}:{self.serializer_class.__name__}:{pet_id}:" \
+               f"{update_times}:{self._origin}:{self._fields}"
+
+    @staticmethod
+    def versions(queryset: PetQuerySet) -> PetQuerySet:
+        return queryset.prefetch_related(None).values_list(
+            'pk', 'updated_at', 'shelter__updated_at', 'shelter__region__updated_at',
+            'shelter__region__country__updated_at')
+
+    def _serialize_instances(self, pets: List[Pet]) -> Dict[int, dict]:
+        serialized = self.serializer_class(pets, many=True, context=self.context).data
+
+        return {pet.pk: payload for pet, payload in zip(pets, serialized)}
+
+    def serialize_versions(self, model: Type[Pet], versions: Iterable[PetVersion]) -> List[dict]:
+        """Model can be Pet for versions of both dogs and cats."""
+        versions = list(versions)
+
+        def serialize_missing(pet_ids: List[int]) -> Dict[int, dict]:
+            if self.values_serialization:
+                return PetValuesSerializer(self.context).to_representations(pet_ids)
+
+            fields = set(self.context.get('fields') or self.serializer_class.Meta.fields)
+
+            pets = {}
+            for pet_type_model in ((Dog, Cat) if model is Pet else (model,)):
+                queryset = pet_type_model.objects.all()
+                if 'profile_photos' in fields:
+                    queryset = queryset.prefetch_related('profile_photos')
+                if 'shelter' in fields:
+                    queryset = queryset.select_related_full_shelter()
+                elif 'is_available' in fields:
+                    queryset = queryset.select_related('shelter')
+
+                pets.update(queryset.in_bulk(pet_ids))
+
+            return self._serialize_instances([pets[pet_id] for pet_id in pet_ids if pet_id in pets])
+
+        return self._serialize(
+            pet_ids=[pet_id for pet_id, _, _ in versions],
+            keys=[self._cache_key(*version) for version in versions],
+            serialize_missing=serialize_missing,
+        )
+
+    def serialize_pets(self, pets: Iterable[Pet]) -> List[dict]:
+        pets = list(pets)
+        pets_by_id = {pet.pk: pet for pet in pets}
+
+        def serialize_missing(pet_ids: List[int]) -> Dict[int, dict]:
+            if self.values_serialization:
+                return PetValuesSerializer(self.context).to_representations(pet_ids)
+
+            return self._serialize_instances([pets_by_id[pet_id] for pet_id in pet_ids])
+
+        # Versions are read by ids, pets might be loaded without their shelter, region and country
+        versions = {
+            version[0]: version for version in self.versions(Pet.objects.filter(id__any=list(pets_by_id)).order_by())
+        } if pets else {}
+        pets = [pet for pet in pets if pet.pk in versions]
+
+        return self._serialize(
+            pet_ids=[pet.pk for pet in pets],
+            keys=[self._cache_key(*versions[pet.pk]) for pet in pets],
+            serialize_missing=serialize_missing,
+        )
+
+    def _serialize(self, pet_ids: List[int], keys: List[str],
+                   serialize_missing: Callable[[List[int]], Dict[int, dict]]) -> List[dict]:
+        payloads: Dict[str, dict] = cache.get_many(keys)
+        keys_by_pet_id = dict(zip(pet_ids, keys))
+
+        missing_pet_ids = [pet_id for pet_id, key in keys_by_pet_id.items() if key not in payloads]
+        if missing_pet_ids:
+            missing_payloads = {
+                keys_by_pet_id[pet_id]: payload for pet_id, payload in serialize_missing(missing_pet_ids).items()
+            }
+
+            cache.set_many(missing_payloads, self.CACHE_TIMEOUT)
+            payloads.update(missing_payloads)
+
+        return [payloads[key] for key in keys if key in payloads]
@@ -0,0 +1,44 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Renders the same compact UTF-8 JSON as JSONRenderer with orjson, which is several times faster on pet lists.
+
+    Values orjson does not know or would format differently, like lazy translations and datetimes, are converted
+    by DRF JSON encoder. Indented responses are left to JSONRenderer.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return orjson.dumps(
+            data,
+            default=self._encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Binary MessagePack alternative to JSON for clients sending Accept: application/msgpack.
+
+    Structure is the same as in JSON responses, values msgpack does not know are converted by DRF JSON encoder.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=self._encoder.default)
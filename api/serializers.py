@@ -1,13 +1,18 @@
+from collections import defaultdict
 from logging import getLogger
+from typing import Dict, List, Optional
 
 from django.contrib.auth.models import Group
+from django.contrib.gis.geos import Point
+from django.db.models import F
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
-from api.fields import EnumField
+from api.fields import EncodedIdSetField, EnumField
 from api.firebase import Firebase
 from api.utils import first_or_none
-from web.models import Country, GetPetRequest, Pet, PetProfilePhoto, PetType, Region, Shelter, User, UserPetChoice
+from web.models import Cat, Country, Dog, GENERATE_PETS_DECK_SIZE, GetPetRequest, Pet, PetGender, PetProfilePhoto, \
+    PetSize, PetStatus, PetType, Region, Shelter, User, UserPetChoice
 
 logger = getLogger()
 
@@ -42,11 +47,24 @@ class PetProfilePhotoSerializer(serializers.ModelSerializer):
 
 class GeneratePetsRequestSerializer(serializers.Serializer):
     liked_pets = serializers.ListField(
-        child=serializers.IntegerField()
+        child=serializers.IntegerField(),
+        required=False,
+        default=list,
+        help_text="Optional for authenticated users, already swiped pets are excluded on server."
     )
 
     disliked_pets = serializers.ListField(
-        child=serializers.IntegerField()
+        child=serializers.IntegerField(),
+        required=False,
+        default=list,
+        help_text="Optional for authenticated users, already swiped pets are excluded on server."
+    )
+
+    seen_pets = EncodedIdSetField(
+        required=False,
+        default=set,
+        help_text="Compact alternative to liked_pets and disliked_pets: sorted pet id ranges, each encoded as varint "
+                  "gap from previous range end and varint range length, in URL safe base64 without padding."
     )
 
     region_code = serializers.SlugRelatedField(
@@ -63,6 +81,96 @@ class GeneratePetsRequestSerializer(serializers.Serializer):
         default=PetType.DOG
     )
 
+    lat = serializers.FloatField(
+        min_value=-90,
+        max_value=90,
+        required=False,
+        allow_null=True,
+        help_text="User location latitude. When given together with lng, pets from nearest shelters are returned first."
+    )
+
+    lng = serializers.FloatField(
+        min_value=-180,
+        max_value=180,
+        required=False,
+        allow_null=True,
+        help_text="User location longitude."
+    )
+
+    max_distance_km = serializers.FloatField(
+        min_value=0,
+        required=False,
+        allow_null=True,
+        help_text="Returns only pets from shelters within given distance from user location."
+    )
+
+    age_min = serializers.IntegerField(
+        min_value=0,
+        required=False,
+        allow_null=True,
+    )
+
+    age_max = serializers.IntegerField(
+        min_value=0,
+        required=False,
+        allow_null=True,
+    )
+
+    size = serializers.ChoiceField(
+        choices=PetSize.choices,
+        required=False,
+        allow_null=True,
+        help_text="Only dogs have size."
+    )
+
+    gender = serializers.ChoiceField(
+        choices=PetGender.choices,
+        required=False,
+        allow_null=True,
+    )
+
+    recommended = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Returns pets most often liked together with user liked pets first. Can't be combined with user "
+                  "location."
+    )
+
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=GENERATE_PETS_DECK_SIZE,
+        required=False,
+        allow_null=True,
+        help_text="Returns only given number of pets together with cursor for the next pets."
+    )
+
+    cursor = serializers.CharField(
+        max_length=32,
+        required=False,
+        allow_null=True,
+        help_text="Cursor returned by previous call, continues the same generated pets deck."
+    )
+
+    def validate(self, attrs):
+        lat, lng = attrs.get('lat'), attrs.get('lng')
+
+        if (lat is None) != (lng is None):
+            raise serializers.ValidationError("Both lat and lng must be provided.")
+
+        if attrs.get('max_distance_km') is not None and lat is None:
+            raise serializers.ValidationError("max_distance_km requires lat and lng.")
+
+        if attrs.get('recommended') and lat is not None:
+            raise serializers.ValidationError("recommended can't be combined with lat and lng.")
+
+        age_min, age_max = attrs.get('age_min'), attrs.get('age_max')
+        if age_min is not None and age_max is not None and age_min > age_max:
+            raise serializers.ValidationError("age_min must be less or equal to age_max.")
+
+        attrs['location'] = Point(lng, lat, srid=4326) if lat is not None else None
+
+        return attrs
+
     def update(self, instance, validated_data):
         raise RuntimeError("Unsupported operation")
 
@@ -87,7 +195,7 @@ class CountryWithRegionSerializer(serializers.ModelSerializer):
 class PetFlatListSerializer(serializers.ModelSerializer):
     shelter = ShelterSerializer()
     profile_photos = PetProfilePhotoSerializer(many=True)
-    description = serializers.CharField(source='description_including_all_information')
+    description = serializers.CharField(source='full_description')
     pet_type = EnumField(enum=PetType, read_only=True)
 
     class Meta:
@@ -95,6 +203,162 @@ class PetFlatListSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'is_available', 'pet_type', 'photo', 'shelter', 'short_description', 'description',
                   'profile_photos', 'updated_at', ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Sparse fieldset selected by fields query parameter
+        fields = self.context.get('fields')
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class PetsByTypeSerializer(serializers.Serializer):
+    dogs = PetFlatListSerializer(many=True)
+    cats = PetFlatListSerializer(many=True)
+
+
+class BootstrapFavoritesSerializer(PetsByTypeSerializer):
+    next = serializers.URLField(allow_null=True, help_text="Favorite pets endpoint page following included favorites.")
+
+
+class BootstrapSerializer(serializers.Serializer):
+    regions = CountryWithRegionSerializer(many=True)
+    pets = PetFlatListSerializer(many=True)
+    favorites = BootstrapFavoritesSerializer()
+
+
+class PetValuesSerializer:
+    """Read only equivalent of PetFlatListSerializer producing the same representation from values() rows and
+    shelter and photo maps, without building model instances or running serializer fields."""
+    _PET_COLUMNS = ['id', 'name', 'status', 'photo', 'shelter_id', 'short_description', 'full_description',
+                    'updated_at']
+    _FIELD_COLUMNS = {
+        'id': ('id',),
+        'name': ('name',),
+        'is_available': ('status', 'shelter_id'),
+        'photo': ('photo',),
+        'shelter': ('shelter_id',),
+        'short_description': ('short_description',),
+        'description': ('full_description',),
+        'updated_at': ('updated_at',),
+    }
+
+    def __init__(self, context: dict):
+        self.request = context.get('request')
+        self.fields = set(context.get('fields') or PetFlatListSerializer.Meta.fields)
+        self.updated_at_field = serializers.DateTimeField()
+
+    def _file_url(self, storage, name: Optional[str]) -> Optional[str]:
+        if not name:
+            return None
+
+        url = storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+    def _shelters(self, shelter_ids: List[int]) -> Dict[int, dict]:
+        shelters = Shelter.objects.filter(id__any=shelter_ids).order_by().values_list(
+            'id', 'name', 'email', 'phone', 'is_published',
+            'region__name', 'region__code', 'region__country__name', 'region__country__code',
+        )
+
+        return {
+            shelter_id: ({
+                'id': shelter_id,
+                'name': name,
+                'email': email,
+                'phone': phone,
+                'region': {
+                    'name': region_name,
+                    'code': region_code,
+                    'country': {
+                        'name': country_name,
+                        'code': country_code,
+                    },
+                },
+            }, is_published)
+            for shelter_id, name, email, phone, is_published, region_name, region_code, country_name, country_code
+            in shelters
+        }
+
+    def _profile_photos(self, pet_ids: List[int]) -> Dict[int, List[dict]]:
+        storage = PetProfilePhoto._meta.get_field('photo').storage
+        photos = PetProfilePhoto.objects.filter(pet__in=pet_ids).order_by('order', 'id').values_list(
+            'pet_id', 'photo')
+
+        profile_photos = defaultdict(list)
+        for pet_id, photo in photos:
+            profile_photos[pet_id].append({'photo': self._file_url(storage, photo)})
+
+        return profile_photos
+
+    def to_representations(self, pet_ids: List[int]) -> Dict[int, dict]:
+        """Representations of dogs and cats by id, pets of both types are read together from the base table.
+
+        Only columns and related rows of fields selected in context are read.
+        """
+        if not pet_ids:
+            return {}
+
+        fields = self.fields
+        columns = {'id'}.union(*(self._FIELD_COLUMNS.get(field, ()) for field in fields))
+
+        pets = list(
+            Pet.objects.filter(id__any=pet_ids).order_by().values(
+                *[column for column in self._PET_COLUMNS if column in columns],
+                dog_id=F('dog__pet_ptr'), cat_id=F('cat__pet_ptr'))
+        )
+
+        shelters = self._shelters(list({pet['shelter_id'] for pet in pets})) if 'shelter_id' in columns else {}
+        profile_photos = self._profile_photos(pet_ids) if 'profile_photos' in fields else {}
+        photo_storage = Pet._meta.get_field('photo').storage
+
+        representations = {}
+        for pet in pets:
+            if pet['dog_id'] is not None:
+                model = Dog
+            elif pet['cat_id'] is not None:
+                model = Cat
+            else:
+                continue
+
+            shelter, is_shelter_published = shelters.get(pet.get('shelter_id'), (None, False))
+
+            # Same keys in the same order as PetFlatListSerializer
+            representation = {}
+            if 'id' in fields:
+                representation['id'] = pet['id']
+            if 'name' in fields:
+                representation['name'] = pet['name']
+            if 'is_available' in fields:
+                representation['is_available'] = pet['status'] == PetStatus.AVAILABLE and is_shelter_published
+            if 'pet_type' in fields:
+                representation['pet_type'] = model.pet_type.value
+            if 'photo' in fields:
+                representation['photo'] = self._file_url(photo_storage, pet['photo'])
+            if 'shelter' in fields:
+                representation['shelter'] = shelter
+            if 'short_description' in fields:
+                representation['short_description'] = pet['short_description']
+            if 'description' in fields:
+                representation['description'] = pet['full_description']
+            if 'profile_photos' in fields:
+                representation['profile_photos'] = profile_photos.get(pet['id'], [])
+            if 'updated_at' in fields:
+                representation['updated_at'] = self.updated_at_field.to_representation(pet['updated_at'])
+
+            representations[pet['id']] = representation
+
+        return representations
+
+
+class PetChangesRequestSerializer(serializers.Serializer):
+    since = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text="Cursor returned by the previous changes request. Without it all available pets are returned."
+    )
+
 
 class UserPetChoiceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -102,6 +366,12 @@ class UserPetChoiceSerializer(serializers.ModelSerializer):
         fields = ['pet', 'is_favorite']
 
 
+class UserPetChoiceItemSerializer(serializers.Serializer):
+    # Pet ids are checked by the upsert statement instead of a query per item, out of range ids would fail it
+    pet = serializers.IntegerField(min_value=1, max_value=2 ** 31 - 1)
+    is_favorite = serializers.BooleanField()
+
+
 class ShelterPetSerializer(serializers.ModelSerializer):
     class Meta:
         model = GetPetRequest
@@ -0,0 +1,48 @@
+import io
+import json
+from collections import OrderedDict
+
+import msgpack
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import MessagePackParser
+from api.renderers import FastJSONRenderer, MessagePackRenderer
+
+PET = OrderedDict([
+    ('id', 1),
+    ('name', "Šuniukas"),
+    ('description', _("Lytis")),
+    ('shelter', {'region': {'code': 'vilnius'}}),
+    ('profile_photos', [{'photo': None}]),
+    ('is_available', True),
+])
+
+
+class FastJSONRendererTest(SimpleTestCase):
+
+    def test_same_output_as_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(PET), JSONRenderer().render(PET))
+
+    def test_empty_response(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class MessagePackTest(SimpleTestCase):
+
+    def test_same_data_as_json_renderer(self):
+        self.assertEqual(msgpack.unpackb(MessagePackRenderer().render([PET])), json.loads(JSONRenderer().render([PET])))
+
+    def test_empty_response(self):
+        self.assertEqual(MessagePackRenderer().render(None), b'')
+
+    def test_parse(self):
+        data = {'liked_pets': [1, 2], 'seen_pets': 'AQ', 'location': None}
+
+        self.assertEqual(MessagePackParser().parse(io.BytesIO(msgpack.packb(data))), data)
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b'\x93\x01'))
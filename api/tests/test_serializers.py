@@ -0,0 +1,80 @@
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import GeneratePetsRequestSerializer, PetFlatListSerializer, PetValuesSerializer, \
+    UserPetChoiceItemSerializer
+from web.models import Cat, Dog, DogProperty, PetProfilePhoto
+from web.tests.factories import CatFactory, DogFactory, ShelterFactory
+
+
+class PetValuesSerializerTest(TestCase):
+
+    def setUp(self):
+        self.context = {'request': APIRequestFactory().get('/')}
+
+    def _assert_same_representation(self, model, pet, context=None):
+        context = context or self.context
+        pet = model.objects.prefetch_related_photos_and_properties().select_related_full_shelter().get(pk=pet.pk)
+
+        expected = PetFlatListSerializer(pet, context=context).data
+        actual = PetValuesSerializer(context).to_representations([pet.pk])
+
+        self.assertDictEqual(actual, {pet.pk: expected})
+
+    def test_dog_with_properties_and_photos(self):
+        dog = DogFactory()
+        dog.properties.add(DogProperty.objects.create(name="Draugiškas"), DogProperty.objects.create(name="Aktyvus"))
+        PetProfilePhoto.objects.create(pet=dog, photo='img/web/pet/second.jpg', order=2)
+        PetProfilePhoto.objects.create(pet=dog, photo='img/web/pet/first.jpg', order=1)
+
+        self._assert_same_representation(Dog, dog)
+
+    def test_cat(self):
+        self._assert_same_representation(Cat, CatFactory(special_information="Reikia vaistų"))
+
+    def test_pet_in_unpublished_shelter(self):
+        self._assert_same_representation(Dog, DogFactory(shelter=ShelterFactory(is_published=False)))
+
+    def test_sparse_fieldset(self):
+        context = dict(self.context, fields=['id', 'name', 'is_available', 'pet_type', 'photo'])
+
+        self._assert_same_representation(Dog, DogFactory(), context)
+
+    def test_dogs_and_cats_together(self):
+        dog = DogFactory()
+        cat = CatFactory()
+
+        representations = PetValuesSerializer(self.context).to_representations([dog.pk, cat.pk, 0])
+
+        self.assertEqual(representations[dog.pk]['pet_type'], 'DOG')
+        self.assertEqual(representations[cat.pk]['pet_type'], 'CAT')
+        self.assertNotIn(0, representations)
+
+
+class GeneratePetsRequestSerializerTest(SimpleTestCase):
+
+    def test_location(self):
+        serializer = GeneratePetsRequestSerializer(data={'lat': 54.68, 'lng': 25.28})
+
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['location'].coords, (25.28, 54.68))
+
+    def test_recommended_with_location_is_rejected(self):
+        serializer = GeneratePetsRequestSerializer(data={'lat': 54.68, 'lng': 25.28, 'recommended': True})
+
+        self.assertFalse(serializer.is_valid())
+
+
+class UserPetChoiceItemSerializerTest(SimpleTestCase):
+
+    def test_pet_id_out_of_database_range_is_rejected(self):
+        for pet_id in (0, 2 ** 31):
+            serializer = UserPetChoiceItemSerializer(data={'pet': pet_id, 'is_favorite': True})
+
+            self.assertFalse(serializer.is_valid())
+            self.assertIn('pet', serializer.errors)
+
+    def test_pet_id(self):
+        serializer = UserPetChoiceItemSerializer(data={'pet': 2 ** 31 - 1, 'is_favorite': True})
+
+        self.assertTrue(serializer.is_valid())
@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from api.utils import decode_id_set, encode_id_set
+
+
+class EncodedIdSetTest(SimpleTestCase):
+
+    def test_encode_empty_set(self):
+        self.assertEqual(encode_id_set([]), '')
+        self.assertSetEqual(decode_id_set(''), set())
+
+    def test_encode_ranges(self):
+        self.assertEqual(encode_id_set([8, 1, 2, 3, 7, 100]), 'AQIEAVwA')
+        self.assertSetEqual(decode_id_set('AQIEAVwA'), {1, 2, 3, 7, 8, 100})
+
+    def test_encode_consecutive_ids_is_compact(self):
+        encoded = encode_id_set(range(1, 3001))
+
+        self.assertEqual(len(encoded), 4)
+        self.assertSetEqual(decode_id_set(encoded), set(range(1, 3001)))
+
+    def test_round_trip(self):
+        ids = {1, 5, 6, 128, 129, 130, 16384, 2 ** 31 - 1}
+
+        self.assertSetEqual(decode_id_set(encode_id_set(ids)), ids)
+
+    def test_decode_malformed_value(self):
+        with self.assertRaises(ValueError):
+            decode_id_set('////')
+
+        with self.assertRaises(ValueError):
+            decode_id_set('a')
+
+    def test_decode_too_many_ids(self):
+        with self.assertRaises(ValueError):
+            decode_id_set(encode_id_set(range(1, 200_000)))
@@ -1,4 +1,20 @@
-from django.test import SimpleTestCase
+from datetime import timedelta
+from unittest import mock
+
+import msgpack
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_tracking.models import APIRequestLog
+
+from api.pagination import FavoritePetsPagination, KeysetPagination
+from api.utils import encode_id_set
+from web.choice_buffer import PetChoiceBuffer
+from web.decks import UserPetDeck
+from web.models import Pet, PetChange, PetStatus, PetType, Shelter, UserPetChoice
+from web.tests.factories import CatFactory, DogFactory, RegionFactory, ShelterFactory, UserFactory
+from web.tests.fake_redis import FakeRedis
 
 
 class ApiSchemaTest(SimpleTestCase):
@@ -6,3 +22,712 @@ class ApiSchemaTest(SimpleTestCase):
     def test_api_schema(self):
         response = self.client.get('/api/?format=openapi')
         self.assertEqual(response.status_code, 200)
+
+
+class PetGenerateListViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.client = APIClient()
+        self.user = UserFactory()
+
+        self.dog1 = DogFactory()
+        self.dog2 = DogFactory()
+        self.dog3 = DogFactory()
+
+    def _generated_pet_ids(self, data):
+        response = self.client.post('/api/v1/pets/generate/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        return {pet['id'] for pet in response.json()}
+
+    def test_generate_pets_excludes_client_supplied_pets(self):
+        pet_ids = self._generated_pet_ids({'liked_pets': [self.dog1.pk], 'disliked_pets': [self.dog2.pk]})
+
+        self.assertSetEqual(pet_ids, {self.dog3.pk})
+
+    def test_generate_pets_excludes_encoded_seen_pets(self):
+        pet_ids = self._generated_pet_ids({'seen_pets': encode_id_set([self.dog1.pk, self.dog3.pk])})
+
+        self.assertSetEqual(pet_ids, {self.dog2.pk})
+
+    def test_generate_pets_message_pack(self):
+        response = self.client.post('/api/v1/pets/generate/', msgpack.packb({'liked_pets': [self.dog1.pk]}),
+                                    content_type='application/msgpack', HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertIn('Accept', response['Vary'])
+        self.assertSetEqual({pet['id'] for pet in msgpack.unpackb(response.content)}, {self.dog2.pk, self.dog3.pk})
+
+    def test_generate_pets_invalid_encoded_seen_pets(self):
+        response = self.client.post('/api/v1/pets/generate/', {'seen_pets': '////'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_generate_pets_without_swiped_pets(self):
+        pet_ids = self._generated_pet_ids({})
+
+        self.assertSetEqual(pet_ids, {self.dog1.pk, self.dog2.pk, self.dog3.pk})
+
+    def test_generate_pets_excludes_user_choices(self):
+        UserPetChoice.objects.create(user=self.user, pet=self.dog1, is_favorite=True)
+        UserPetChoice.objects.create(user=self.user, pet=self.dog2, is_favorite=False)
+        UserPetChoice.objects.create(user=UserFactory(), pet=self.dog3, is_favorite=False)
+
+        self.client.force_authenticate(self.user)
+        pet_ids = self._generated_pet_ids({})
+
+        self.assertSetEqual(pet_ids, {self.dog3.pk})
+
+    @override_settings(USER_PET_DECKS=True)
+    @mock.patch('web.decks._redis', return_value=FakeRedis())
+    def test_generate_pets_from_user_deck(self, _redis):
+        UserPetDeck.refill(self.user, PetType.DOG)
+
+        self.client.force_authenticate(self.user)
+        pet_ids = self._generated_pet_ids({'disliked_pets': [self.dog1.pk]})
+
+        self.assertSetEqual(pet_ids, {self.dog2.pk, self.dog3.pk})
+
+    def test_generate_pets_with_limit_and_cursor(self):
+        response = self.client.post('/api/v1/pets/generate/', {'limit': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        first_page = response.json()
+        self.assertEqual(len(first_page['results']), 2)
+        self.assertIsNotNone(first_page['cursor'])
+
+        response = self.client.post('/api/v1/pets/generate/', {'limit': 2, 'cursor': first_page['cursor']},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+
+        second_page = response.json()
+        self.assertEqual(len(second_page['results']), 1)
+        self.assertIsNone(second_page['cursor'])
+
+        pet_ids = {pet['id'] for pet in first_page['results'] + second_page['results']}
+        self.assertSetEqual(pet_ids, {self.dog1.pk, self.dog2.pk, self.dog3.pk})
+
+    def test_generate_pets_cursor_skips_pets_chosen_since(self):
+        self.client.force_authenticate(self.user)
+        first_page = self.client.post('/api/v1/pets/generate/', {'limit': 1}, format='json').json()
+        deck_pet_ids = {self.dog1.pk, self.dog2.pk, self.dog3.pk} - {pet['id'] for pet in first_page['results']}
+        chosen_pet_id, swiped_pet_id = sorted(deck_pet_ids)
+
+        UserPetChoice.objects.create(user=self.user, pet_id=chosen_pet_id, is_favorite=True)
+        response = self.client.post('/api/v1/pets/generate/',
+                                    {'limit': 2, 'cursor': first_page['cursor'], 'disliked_pets': [swiped_pet_id]},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertListEqual(response.json()['results'], [])
+
+    def test_generate_pets_with_expired_cursor(self):
+        response = self.client.post('/api/v1/pets/generate/', {'limit': 5, 'cursor': 'expired'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(len(response.json()['results']), 3)
+
+
+class UserPetChoiceViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.client = APIClient()
+        self.user = UserFactory()
+
+        self.dog1 = DogFactory()
+        self.dog2 = DogFactory()
+
+    @override_settings(USER_PET_DECKS=True)
+    @mock.patch('web.decks._redis', return_value=FakeRedis())
+    def test_swiped_pet_is_removed_from_user_deck(self, _redis):
+        UserPetDeck.refill(self.user, PetType.DOG)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.put('/api/v1/pets/pet/choice/', {'pet': self.dog1.pk, 'is_favorite': True},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertListEqual(UserPetDeck.pop(self.user, PetType.DOG, 10), [self.dog2.pk])
+
+    @mock.patch('api.views.UserPetChoiceView.logging_sample_rate', 0)
+    def test_only_errors_are_logged_when_not_sampled(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.put('/api/v1/pets/pet/choice/', {'pet': self.dog1.pk, 'is_favorite': True},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(APIRequestLog.objects.exists())
+
+        response = self.client.put('/api/v1/pets/pet/choice/', {'is_favorite': True}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(APIRequestLog.objects.get().status_code, 400)
+
+
+class UserPetChoicesViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(self.user)
+
+        self.dog1 = DogFactory()
+        self.dog2 = DogFactory()
+        self.dog3 = DogFactory()
+
+    def _post_choices(self, choices):
+        response = self.client.post('/api/v3/pets/choices/', choices, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        return response.json()['saved_pets']
+
+    def _user_choices(self):
+        return dict(UserPetChoice.objects.filter(user=self.user).values_list('pet_id', 'is_favorite'))
+
+    def test_choices_are_upserted(self):
+        UserPetChoice.objects.create(user=self.user, pet=self.dog1, is_favorite=False)
+        deleted_dog = DogFactory()
+        deleted_dog_id = deleted_dog.pk
+        deleted_dog.delete()
+
+        choices = [
+            {'pet': self.dog1.pk, 'is_favorite': True},
+            {'pet': self.dog2.pk, 'is_favorite': False},
+            {'pet': deleted_dog_id, 'is_favorite': True},
+        ]
+
+        self.assertListEqual(self._post_choices(choices), [self.dog1.pk, self.dog2.pk])
+        self.assertListEqual(self._post_choices(choices), [self.dog1.pk, self.dog2.pk])
+        self.assertDictEqual(self._user_choices(), {self.dog1.pk: True, self.dog2.pk: False})
+
+    def test_later_choice_of_the_same_pet_wins(self):
+        self._post_choices([{'pet': self.dog1.pk, 'is_favorite': True}, {'pet': self.dog1.pk, 'is_favorite': False}])
+
+        self.assertDictEqual(self._user_choices(), {self.dog1.pk: False})
+
+    @override_settings(USER_PET_DECKS=True)
+    @mock.patch('web.decks._redis', return_value=FakeRedis())
+    def test_chosen_pets_are_removed_from_user_deck(self, _redis):
+        UserPetDeck.refill(self.user, PetType.DOG)
+
+        self._post_choices([{'pet': self.dog1.pk, 'is_favorite': True}, {'pet': self.dog3.pk, 'is_favorite': False}])
+
+        self.assertListEqual(UserPetDeck.pop(self.user, PetType.DOG, 10), [self.dog2.pk])
+
+    def test_empty_batch(self):
+        response = self.client.post('/api/v3/pets/choices/', [], format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(PET_CHOICES_WRITE_BEHIND=True, USER_PET_DECKS=True)
+class PetChoicesWriteBehindTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        fake_redis = FakeRedis()
+        for patcher in (mock.patch('web.choice_buffer._redis', return_value=fake_redis),
+                        mock.patch('web.decks._redis', return_value=fake_redis)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(self.user)
+
+        self.dog1 = DogFactory()
+        self.dog2 = DogFactory()
+        self.dog3 = DogFactory()
+
+    def _user_choices(self):
+        return dict(UserPetChoice.objects.filter(user=self.user).values_list('pet_id', 'is_favorite'))
+
+    def test_choice_is_buffered(self):
+        UserPetDeck.refill(self.user, PetType.DOG)
+
+        response = self.client.put('/api/v1/pets/pet/choice/', {'pet': self.dog1.pk, 'is_favorite': True},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertDictEqual(self._user_choices(), {})
+        self.assertDictEqual(PetChoiceBuffer.pending(self.user.pk), {self.dog1.pk: True})
+        self.assertNotIn(self.dog1.pk, UserPetDeck.pop(self.user, PetType.DOG, 10))
+
+        PetChoiceBuffer.flush()
+        self.assertDictEqual(self._user_choices(), {self.dog1.pk: True})
+
+    def test_choices_batch_is_buffered_after_earlier_choices(self):
+        self.client.put('/api/v1/pets/pet/choice/', {'pet': self.dog1.pk, 'is_favorite': True}, format='json')
+
+        response = self.client.post('/api/v3/pets/choices/', [
+            {'pet': self.dog1.pk, 'is_favorite': False},
+            {'pet': self.dog2.pk, 'is_favorite': True},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.json()['saved_pets'], [self.dog1.pk, self.dog2.pk])
+
+        self.assertDictEqual(self._user_choices(), {})
+        self.assertDictEqual(PetChoiceBuffer.pending(self.user.pk), {self.dog1.pk: False, self.dog2.pk: True})
+
+        PetChoiceBuffer.flush()
+        self.assertDictEqual(self._user_choices(), {self.dog1.pk: False, self.dog2.pk: True})
+
+    def test_generated_pets_exclude_buffered_choices(self):
+        PetChoiceBuffer.append(self.user.pk, self.dog1.pk, True)
+
+        response = self.client.post('/api/v1/pets/generate/', {}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertSetEqual({pet['id'] for pet in response.json()}, {self.dog2.pk, self.dog3.pk})
+
+    def test_bootstrap_favorites_include_buffered_choices(self):
+        UserPetChoice.objects.create(user=self.user, pet=self.dog1, is_favorite=True)
+        PetChoiceBuffer.append_many(self.user.pk, {self.dog1.pk: False, self.dog2.pk: True})
+
+        response = self.client.post('/api/v3/bootstrap/', {}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertListEqual([pet['id'] for pet in data['favorites']['dogs']], [self.dog2.pk])
+        self.assertListEqual([pet['id'] for pet in data['pets']], [self.dog3.pk])
+
+
+class PetPayloadCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.dog = DogFactory(name="Reksas")
+
+    def _dog_names(self):
+        response = self.client.get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+        self.assertEqual(response.status_code, 200)
+
+        return [pet['name'] for pet in response.json()['dogs']]
+
+    def test_unchanged_pet_is_returned_from_cache(self):
+        self.assertListEqual(self._dog_names(), ["Reksas"])
+
+        Pet.objects.filter(pk=self.dog.pk).update(name="Brisius")
+
+        self.assertListEqual(self._dog_names(), ["Reksas"])
+
+    def test_updated_pet_is_serialized_again(self):
+        self.assertListEqual(self._dog_names(), ["Reksas"])
+
+        self.dog.name = "Brisius"
+        self.dog.save()
+
+        self.assertListEqual(self._dog_names(), ["Brisius"])
+
+    def test_pet_is_serialized_again_after_region_and_country_change(self):
+        region = self.dog.shelter.region
+        self.client.get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+
+        region.name = "Kauno apskritis"
+        region.save()
+        self.client.get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+
+        region.country.name = "Latvija"
+        region.country.save()
+
+        response = self.client.get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+        self.assertDictEqual(response.json()['dogs'][0]['shelter']['region'], {
+            'name': "Kauno apskritis",
+            'code': region.code,
+            'country': {'name': "Latvija", 'code': region.country.code},
+        })
+
+    def test_paginated_pets_list(self):
+        dog = DogFactory()
+
+        response = self.client.get('/api/v1/pets/', {'pet_ids': f'{self.dog.pk},{dog.pk}'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertListEqual([pet['id'] for pet in response.json()['results']], [dog.pk, self.dog.pk])
+
+
+@mock.patch.object(KeysetPagination, 'page_size', 2)
+class PetListViewKeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.dogs = [DogFactory() for _ in range(3)]
+        self.pet_ids = ','.join(str(dog.pk) for dog in self.dogs)
+
+    def test_pages_follow_next_link(self):
+        response = self.client.get('/api/v1/pets/', {'pet_ids': self.pet_ids, 'cursor': ''})
+        self.assertEqual(response.status_code, 200)
+
+        first_page = response.json()
+        self.assertNotIn('count', first_page)
+        self.assertListEqual([pet['id'] for pet in first_page['results']], [self.dogs[2].pk, self.dogs[1].pk])
+
+        second_page = self.client.get(first_page['next']).json()
+        self.assertListEqual([pet['id'] for pet in second_page['results']], [self.dogs[0].pk])
+        self.assertIsNone(second_page['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ['x', '-1', '0', '99999999999', '1.5']:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/v1/pets/', {'pet_ids': self.pet_ids, 'cursor': cursor})
+
+                self.assertEqual(response.status_code, 404)
+
+    def test_max_cursor(self):
+        response = self.client.get('/api/v1/pets/', {'pet_ids': self.pet_ids, 'cursor': KeysetPagination.max_cursor})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertListEqual([pet['id'] for pet in response.json()['results']], [self.dogs[2].pk, self.dogs[1].pk])
+
+    def test_page_number_pagination_without_cursor(self):
+        response = self.client.get('/api/v1/pets/', {'pet_ids': self.pet_ids, 'page': 2})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(response.json()['count'], 3)
+
+
+class SparseFieldsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.dog = DogFactory()
+
+    def test_only_selected_fields_are_returned(self):
+        response = self.client.get('/api/v2/pets/', {'pet_ids': self.dog.pk, 'fields': 'name,photo,short_description'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertListEqual(list(response.json()['dogs'][0]), ['id', 'name', 'pet_type', 'photo', 'short_description'])
+
+    def test_full_and_sparse_payloads_are_cached_separately(self):
+        self.client.get('/api/v2/pets/', {'pet_ids': self.dog.pk, 'fields': 'name'})
+
+        response = self.client.get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+
+        self.assertIn('shelter', response.json()['dogs'][0])
+
+    def test_unknown_field(self):
+        response = self.client.get('/api/v2/pets/', {'pet_ids': self.dog.pk, 'fields': 'name,password'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class NormalizedSheltersTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.shelter = ShelterFactory()
+        self.dogs = [DogFactory(shelter=self.shelter) for _ in range(2)]
+        self.cat = CatFactory()
+        self.pet_ids = f'{self.dogs[0].pk},{self.dogs[1].pk},{self.cat.pk}'
+
+    def test_shelters_returned_once(self):
+        response = self.client.get('/api/v2/pets/', {'pet_ids': self.pet_ids, 'normalized': 'true'})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertSetEqual(set(data['shelters']), {str(self.shelter.pk), str(self.cat.shelter_id)})
+        self.assertEqual(data['shelters'][str(self.shelter.pk)]['name'], self.shelter.name)
+
+        for pet in data['dogs'] + data['cats']:
+            self.assertNotIn('shelter', pet)
+            self.assertIn(str(pet['shelter_id']), data['shelters'])
+
+    def test_paginated_list(self):
+        response = self.client.get('/api/v1/pets/', {'pet_ids': self.pet_ids, 'normalized': '1', 'cursor': ''})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertListEqual(list(data['shelters']), [str(self.shelter.pk)])
+
+    def test_invalid_value(self):
+        response = self.client.get('/api/v2/pets/', {'pet_ids': self.pet_ids, 'normalized': 'maybe'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class BootstrapViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.client = APIClient()
+        self.user = UserFactory()
+
+        self.liked_dog = DogFactory()
+        self.favorite_cat = CatFactory()
+        self.new_dog = DogFactory()
+
+    def test_bootstrap(self):
+        UserPetChoice.objects.create(user=self.user, pet=self.favorite_cat, is_favorite=True)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.post('/api/v3/bootstrap/', {'liked_pets': [self.liked_dog.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertListEqual([country['code'] for country in data['regions']], ['lt'])
+        self.assertListEqual([pet['id'] for pet in data['pets']], [self.new_dog.pk])
+        self.assertListEqual([pet['id'] for pet in data['favorites']['dogs']], [self.liked_dog.pk])
+        self.assertListEqual([pet['id'] for pet in data['favorites']['cats']], [self.favorite_cat.pk])
+
+    def test_bootstrap_anonymous_without_favorites(self):
+        response = self.client.post('/api/v3/bootstrap/', {}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertDictEqual(response.json()['favorites'], {'dogs': [], 'cats': [], 'next': None})
+
+    @mock.patch.object(FavoritePetsPagination, 'page_size', 1)
+    def test_bootstrap_favorites_limited_to_first_page(self):
+        UserPetChoice.objects.create(user=self.user, pet=self.liked_dog, is_favorite=True)
+        latest_choice = UserPetChoice.objects.create(user=self.user, pet=self.favorite_cat, is_favorite=True)
+        self.client.force_authenticate(self.user)
+
+        favorites = self.client.post('/api/v3/bootstrap/', {}, format='json').json()['favorites']
+
+        self.assertListEqual(favorites['dogs'], [])
+        self.assertListEqual([pet['id'] for pet in favorites['cats']], [self.favorite_cat.pk])
+        self.assertEqual(favorites['next'], f'http://testserver/api/v3/me/favorites/?cursor={latest_choice.pk}')
+
+        response = self.client.get(favorites['next'])
+        self.assertListEqual([pet['id'] for pet in response.json()['results']], [self.liked_dog.pk])
+
+
+@mock.patch.object(FavoritePetsPagination, 'page_size', 2)
+class FavoritePetsListViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.client = APIClient()
+        self.user = UserFactory()
+
+        self.pets = [DogFactory(), CatFactory(), DogFactory()]
+        for pet in self.pets:
+            UserPetChoice.objects.create(user=self.user, pet=pet, is_favorite=True)
+
+        UserPetChoice.objects.create(user=self.user, pet=DogFactory(), is_favorite=False)
+        UserPetChoice.objects.create(user=UserFactory(), pet=DogFactory(), is_favorite=True)
+
+    def test_favorites_paged_from_latest_choice(self):
+        self.client.force_authenticate(self.user)
+
+        first_page = self.client.get('/api/v3/me/favorites/').json()
+        self.assertListEqual([pet['id'] for pet in first_page['results']], [self.pets[2].pk, self.pets[1].pk])
+
+        second_page = self.client.get(first_page['next']).json()
+        self.assertListEqual([pet['id'] for pet in second_page['results']], [self.pets[0].pk])
+        self.assertIsNone(second_page['next'])
+
+    def test_favorites_require_authentication(self):
+        response = self.client.get('/api/v3/me/favorites/')
+
+        self.assertEqual(response.status_code, 401)
+
+
+class SelectedPetsListViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pets_split_by_type(self):
+        dog1 = DogFactory()
+        dog2 = DogFactory()
+        cat = CatFactory()
+        DogFactory()
+
+        response = self.client.get('/api/v2/pets/', {'pet_ids': f'{dog1.pk},{dog2.pk},{cat.pk}'})
+        self.assertEqual(response.status_code, 200)
+
+        pets = response.json()
+        self.assertListEqual([pet['id'] for pet in pets['dogs']], [dog2.pk, dog1.pk])
+        self.assertListEqual([pet['id'] for pet in pets['cats']], [cat.pk])
+
+
+class ConditionalResponsesTest(TestCase):
+
+    def setUp(self):
+        self.dog = DogFactory()
+
+    def _get(self, url, data=None, **headers):
+        response = self.client.get(url, data, **headers)
+        self.assertIn(response.status_code, (200, 304))
+
+        return response
+
+    def test_not_modified_pets(self):
+        response = self._get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+
+        response = self._get('/api/v2/pets/', {'pet_ids': self.dog.pk}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('Accept', response['Vary'])
+
+    def test_modified_pets(self):
+        response = self._get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+
+        self.dog.name = "Brisius"
+        self.dog.save()
+
+        response = self._get('/api/v2/pets/', {'pet_ids': self.dog.pk}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_modified_pet_region(self):
+        response = self._get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+
+        region = self.dog.shelter.region
+        region.name = "Vilniaus apskritis"
+        region.save()
+
+        response = self._get('/api/v2/pets/', {'pet_ids': self.dog.pk}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_pets_modified_since_pet_deletion(self):
+        dog = DogFactory()
+        pet_ids = f'{self.dog.pk},{dog.pk}'
+        response = self._get('/api/v2/pets/', {'pet_ids': pet_ids})
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=2)):
+            dog.delete()
+
+        response = self._get('/api/v2/pets/', {'pet_ids': pet_ids}, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_pets_etag_depends_on_filter(self):
+        response = self._get('/api/v2/pets/', {'pet_ids': self.dog.pk})
+
+        response = self._get('/api/v2/pets/', {'pet_ids': self.dog.pk, 'last_update': '2020-01-01T00:00:00Z'},
+                             HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_regions_not_modified_until_region_changes(self):
+        response = self._get('/api/v1/regions/')
+        etag = response['ETag']
+
+        response = self._get('/api/v1/regions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        RegionFactory()
+
+        response = self._get('/api/v1/regions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class PetChangesListViewTest(TestCase):
+
+    def setUp(self):
+        self.dog = DogFactory()
+        self.cat = CatFactory()
+
+        safety_lag = mock.patch.object(PetChange, 'SAFETY_LAG', timedelta(0))
+        safety_lag.start()
+        self.addCleanup(safety_lag.stop)
+
+    def _changes(self, since=None):
+        response = self.client.get('/api/v3/pets/changes/', {'since': since} if since is not None else {})
+        self.assertEqual(response.status_code, 200)
+
+        return response.json()
+
+    def test_all_pets_without_cursor(self):
+        changes = self._changes()
+
+        self.assertListEqual([pet['id'] for pet in changes['dogs']], [self.dog.pk])
+        self.assertListEqual([pet['id'] for pet in changes['cats']], [self.cat.pk])
+        self.assertListEqual(changes['removed'], [])
+        self.assertFalse(changes['has_more'])
+        self.assertTrue(changes['resync'])
+
+    def test_changes_since_cursor(self):
+        cursor = self._changes()['cursor']
+
+        self.assertListEqual(self._changes(cursor)['dogs'], [])
+
+        self.dog.name = "Brisius"
+        self.dog.save()
+
+        changes = self._changes(cursor)
+        self.assertListEqual([pet['name'] for pet in changes['dogs']], ["Brisius"])
+        self.assertListEqual(changes['cats'], [])
+
+    def test_removed_pets(self):
+        cursor = self._changes()['cursor']
+
+        self.dog.status = PetStatus.TAKEN_NOT_VIA_GETPET
+        self.dog.save()
+        cat_pk = self.cat.pk
+        self.cat.delete()
+
+        changes = self._changes(cursor)
+        self.assertListEqual(changes['dogs'], [])
+        self.assertListEqual(changes['removed'], sorted([self.dog.pk, cat_pk]))
+
+    def test_removed_pets_by_queryset(self):
+        cursor = self._changes()['cursor']
+
+        Pet.objects.filter(pk=self.dog.pk).update(status=PetStatus.TAKEN_NOT_VIA_GETPET)
+        Pet.objects.filter(pk=self.cat.pk).delete()
+
+        changes = self._changes(cursor)
+        self.assertListEqual(changes['dogs'], [])
+        self.assertListEqual(changes['cats'], [])
+        self.assertListEqual(changes['removed'], sorted([self.dog.pk, self.cat.pk]))
+
+    def test_changed_pets_by_shelter_queryset(self):
+        cursor = self._changes()['cursor']
+
+        Shelter.objects.filter(pk=self.dog.shelter_id).update(name="Naujas")
+
+        changes = self._changes(cursor)
+        self.assertListEqual([pet['id'] for pet in changes['dogs']], [self.dog.pk])
+        self.assertListEqual(changes['cats'], [])
+
+    def test_pet_order_update_is_not_a_change(self):
+        cursor = self._changes()['cursor']
+
+        Pet.objects.filter(pk=self.dog.pk).update(order=1, random_key=0.5)
+
+        self.assertListEqual(self._changes(cursor)['dogs'], [])
+
+    def test_recent_changes_are_returned_after_safety_lag(self):
+        cursor = self._changes()['cursor']
+
+        self.dog.name = "Brisius"
+        self.dog.save()
+
+        with mock.patch.object(PetChange, 'SAFETY_LAG', timedelta(minutes=1)):
+            changes = self._changes(cursor)
+            self.assertListEqual(changes['dogs'], [])
+            self.assertEqual(changes['cursor'], cursor)
+
+        self.assertListEqual([pet['name'] for pet in self._changes(cursor)['dogs']], ["Brisius"])
+
+    def test_resync_after_changes_are_deleted(self):
+        cursor = self._changes()['cursor']
+
+        self.dog.save()
+        self.cat.save()
+        PetChange.objects.filter(id__lte=cursor + 1).delete()
+
+        changes = self._changes(cursor)
+        self.assertTrue(changes['resync'])
+        self.assertListEqual([pet['id'] for pet in changes['dogs']], [self.dog.pk])
+        self.assertListEqual([pet['id'] for pet in changes['cats']], [self.cat.pk])
+
+        changes = self._changes(changes['cursor'])
+        self.assertFalse(changes['resync'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v3/pets/changes/', {'since': 'invalid'})
+
+        self.assertEqual(response.status_code, 400)
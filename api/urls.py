@@ -6,16 +6,21 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
-from api.views import CountriesAndRegionsListView, FirebaseConnect, PetGenerateListView, PetListView, \
-    PetProfilePhotoView, SelectedPetsListView, ShelterPetView, UserPetChoiceView
+from api.views import BootstrapView, CountriesAndRegionsListView, FavoritePetsListView, FirebaseConnect, \
+    PetChangesListView, PetGenerateListView, PetListView, PetProfilePhotoView, SelectedPetsListView, ShelterPetView, \
+    UserPetChoicesView, UserPetChoiceView
 from getpet import settings
 
 public_api_url_patterns = [
     path('v1/pets/', PetListView.as_view(), name="api_pets_v1"),
     path('v2/pets/', SelectedPetsListView.as_view(), name="api_pets"),
+    path('v3/pets/changes/', PetChangesListView.as_view(), name="api_pet_changes"),
+    path('v3/bootstrap/', BootstrapView.as_view(), name="api_bootstrap"),
+    path('v3/me/favorites/', FavoritePetsListView.as_view(), name="api_favorite_pets"),
 
     path('v1/regions/', CountriesAndRegionsListView.as_view(), name="api_regions"),
     path('v1/pets/pet/choice/', UserPetChoiceView.as_view(), name="api_pet_choice"),
+    path('v3/pets/choices/', UserPetChoicesView.as_view(), name="api_pet_choices"),
     path('v1/pets/pet/shelter/', ShelterPetView.as_view(), name="api_pet_shelter"),
     path('v1/pets/pet/profile/photo/', PetProfilePhotoView.as_view(), name="api_pet_profile_photo"),
     path('v1/pets/generate/', PetGenerateListView.as_view(), name="api_pets_generate"),
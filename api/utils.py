@@ -1,5 +1,95 @@
+import base64
+import binascii
+from typing import Iterable, Set, Tuple
+
+
 def first_or_none(iterable, condition=lambda x: True):
     try:
         return next(x for x in iterable if condition(x))
     except StopIteration:
         return None
+
+
+_MAX_ENCODED_IDS = 100_000
+_MAX_ID = 2 ** 31 - 1
+
+
+def _write_varint(data: bytearray, value: int) -> None:
+    while value >= 0x80:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    data.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+
+    while True:
+        if position >= len(data) or shift > 28:
+            raise ValueError("Malformed varint")
+
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+
+        if not byte & 0x80:
+            return value, position
+
+
+def encode_id_set(ids: Iterable[int]) -> str:
+    """Encodes ids as consecutive ranges, where each range is varint gap from previous range and varint length.
+    Result is URL safe base64 without padding.
+    """
+    data = bytearray()
+    previous_end = 0
+    range_start = None
+    range_end = None
+
+    for pet_id in sorted(set(ids)):
+        if range_end is not None and pet_id == range_end + 1:
+            range_end = pet_id
+            continue
+
+        if range_start is not None:
+            _write_varint(data, range_start - previous_end)
+            _write_varint(data, range_end - range_start)
+            previous_end = range_end
+
+        range_start = range_end = pet_id
+
+    if range_start is not None:
+        _write_varint(data, range_start - previous_end)
+        _write_varint(data, range_end - range_start)
+
+    return base64.urlsafe_b64encode(bytes(data)).decode('ascii').rstrip('=')
+
+
+def decode_id_set(value: str) -> Set[int]:
+    try:
+        data = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("Malformed base64") from e
+
+    ids: Set[int] = set()
+    position = 0
+    previous_end = 0
+
+    while position < len(data):
+        gap, position = _read_varint(data, position)
+        length, position = _read_varint(data, position)
+
+        start = previous_end + gap
+        previous_end = start + length
+
+        if len(ids) + length + 1 > _MAX_ENCODED_IDS:
+            raise ValueError(f"More than {_MAX_ENCODED_IDS} ids encoded")
+
+        if previous_end > _MAX_ID:
+            raise ValueError(f"Id is bigger than {_MAX_ID}")
+
+        ids.update(range(start, previous_end + 1))
+
+    return ids
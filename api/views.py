@@ -1,27 +1,51 @@
+from typing import List
+
+from django.conf import settings
+from django.urls import reverse
 from django.utils.decorators import method_decorator
-from drf_multiple_model.views import ObjectMultipleModelAPIView
+from django.utils.functional import cached_property
+from django.views.decorators.http import condition
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.authentication import SessionAuthentication
-from rest_framework.generics import CreateAPIView, ListAPIView, UpdateAPIView
+from rest_framework.generics import CreateAPIView, GenericAPIView, ListAPIView, UpdateAPIView
 from rest_framework.mixins import ListModelMixin
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
+from api.conditions import countries_etag, countries_last_modified, pets_etag, pets_last_modified
+from api.decks import PetDeck
 from api.filters import PetFilter
-from api.mixins import ApiLoggingMixin
-from api.serializers import CountryWithRegionSerializer, FirebaseSerializer, GeneratePetsRequestSerializer, \
-    PetFlatListSerializer, PetProfilePhotoUploadSerializer, ShelterPetSerializer, TokenSerializer, \
-    UserPetChoiceSerializer
-from web.models import Cat, Country, Dog, GetPetRequest, PetType, UserPetChoice
+from api.mixins import ApiLoggingMixin, NormalizedSheltersMixin, SparseFieldsMixin, VaryOnAcceptMixin
+from api.pagination import FavoritePetsPagination, KeysetPagination
+from api.payloads import PetPayloadCache
+from api.renderers import FastJSONRenderer, MessagePackRenderer
+from api.serializers import BootstrapSerializer, CountryWithRegionSerializer, FirebaseSerializer, \
+    GeneratePetsRequestSerializer, PetChangesRequestSerializer, PetFlatListSerializer, \
+    PetProfilePhotoUploadSerializer, PetsByTypeSerializer, ShelterPetSerializer, TokenSerializer, \
+    UserPetChoiceItemSerializer, UserPetChoiceSerializer
+from web.choice_buffer import PetChoiceBuffer
+from web.decks import UserPetDeck
+from web.models import Cat, Country, Dog, GENERATE_PETS_DECK_SIZE, GetPetRequest, Pet, PetChange, PetType, \
+    UserPetChoice
+
+
+def _split_by_pet_type(pets: List[dict]) -> dict:
+    return {
+        'dogs': [pet for pet in pets if pet['pet_type'] == PetType.DOG.value],
+        'cats': [pet for pet in pets if pet['pet_type'] == PetType.CAT.value],
+    }
 
 
 @method_decorator(name='get', decorator=swagger_auto_schema(
     operation_description="Returns all countries and regions.",
     security=[]
 ))
-class CountriesAndRegionsListView(ApiLoggingMixin, ListAPIView):
+@method_decorator(name='get', decorator=condition(etag_func=countries_etag,
+                                                 last_modified_func=countries_last_modified))
+class CountriesAndRegionsListView(VaryOnAcceptMixin, ApiLoggingMixin, ListAPIView):
     queryset = Country.objects.prefetch_related('regions').order_by('name')
     serializer_class = CountryWithRegionSerializer
     permission_classes = (AllowAny,)
@@ -29,48 +53,195 @@ class CountriesAndRegionsListView(ApiLoggingMixin, ListAPIView):
 
 
 @method_decorator(name='get', decorator=swagger_auto_schema(
-    operation_description="Returns all pets.",
+    operation_description="Returns all pets. With cursor parameter pages are seeked by id without counting pets, "
+                          "continue with the returned next link.",
     security=[],
+    manual_parameters=[SparseFieldsMixin.fields_parameter, NormalizedSheltersMixin.normalized_parameter],
     deprecated=True,
 ))
-class PetListView(ListAPIView):
-    queryset = Dog.objects.prefetch_related('profile_photos', 'properties').select_related_full_shelter().order_by(
-        '-pk')
+class PetListView(VaryOnAcceptMixin, SparseFieldsMixin, NormalizedSheltersMixin, ListAPIView):
+    queryset = Dog.objects.prefetch_related('profile_photos').select_related_full_shelter().order_by('-pk')
     serializer_class = PetFlatListSerializer
+    pagination_class = KeysetPagination
     permission_classes = (AllowAny,)
+    renderer_classes = (FastJSONRenderer, MessagePackRenderer)
+    values_serialization = True
 
     filterset_class = PetFilter
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        payloads = PetPayloadCache(self.serializer_class, self.get_serializer_context(), self.values_serialization)
+
+        versions = payloads.versions(queryset)
+        page = self.paginate_queryset(versions)
+        data = payloads.serialize_versions(queryset.model, versions if page is None else page)
+
+        if not self.normalized:
+            return Response(data) if page is None else self.get_paginated_response(data)
+
+        data, shelters = self.normalize_shelters(data)
+        response = Response({'results': data}) if page is None else self.get_paginated_response(data)
+        response.data['shelters'] = shelters
+
+        return response
+
 
 @method_decorator(name='get', decorator=swagger_auto_schema(
     operation_description="Returns all pets.",
-    security=[]
+    security=[],
+    manual_parameters=[SparseFieldsMixin.fields_parameter, NormalizedSheltersMixin.normalized_parameter],
+    responses={
+        status.HTTP_200_OK: openapi.Response(
+            description="Returns selected dogs and cats.",
+            schema=PetsByTypeSerializer
+        )
+    }
 ))
-class SelectedPetsListView(ObjectMultipleModelAPIView):
-    querylist = [
-        {
-            'queryset': Dog.objects.prefetch_related('profile_photos',
-                                                     'properties').select_related_full_shelter().order_by('-pk'),
-            'serializer_class': PetFlatListSerializer,
-            'label': 'dogs',
-        },
-        {
-            'queryset': Cat.objects.prefetch_related('profile_photos',
-                                                     'properties').select_related_full_shelter().order_by('-pk'),
-            'serializer_class': PetFlatListSerializer,
-            'label': 'cats',
-        },
-    ]
+@method_decorator(name='get', decorator=condition(etag_func=pets_etag, last_modified_func=pets_last_modified))
+class SelectedPetsListView(VaryOnAcceptMixin, SparseFieldsMixin, NormalizedSheltersMixin, ListAPIView):
+    # Dogs and cats are read from base pet table in one query and split by type after serialization
+    queryset = Pet.objects.order_by('-pk')
     permission_classes = (AllowAny,)
     serializer_class = PetFlatListSerializer
     filterset_class = PetFilter
     pagination_class = None
+    renderer_classes = (FastJSONRenderer, MessagePackRenderer)
+    values_serialization = True
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        payloads = PetPayloadCache(self.serializer_class, self.get_serializer_context(), self.values_serialization)
+
+        pets = payloads.serialize_versions(Pet, payloads.versions(queryset))
+
+        if not self.normalized:
+            return Response(_split_by_pet_type(pets))
+
+        pets, shelters = self.normalize_shelters(pets)
+        return Response(dict(_split_by_pet_type(pets), shelters=shelters))
+
+
+@method_decorator(name='get', decorator=swagger_auto_schema(
+    operation_description="Returns pets changed since the cursor and ids of pets which were removed or are no longer "
+                          "available. Continue with the returned cursor while has_more is true. Without cursor, or "
+                          "when changes after it were already deleted, all available pets are returned with resync "
+                          "true and clients should replace their pets with them.",
+    security=[],
+    query_serializer=PetChangesRequestSerializer,
+    manual_parameters=[SparseFieldsMixin.fields_parameter, NormalizedSheltersMixin.normalized_parameter],
+))
+class PetChangesListView(VaryOnAcceptMixin, SparseFieldsMixin, NormalizedSheltersMixin, GenericAPIView):
+    serializer_class = PetFlatListSerializer
+    permission_classes = (AllowAny,)
+    renderer_classes = (FastJSONRenderer, MessagePackRenderer)
+    values_serialization = True
+    filter_backends = ()
+    pagination_class = None
+    changes_page_size = 1000
+
+    def get(self, request, *args, **kwargs):
+        serializer = PetChangesRequestSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = serializer.validated_data.get('since')
+
+        if since is None or PetChange.is_expired_cursor(since):
+            return self._snapshot()
+
+        changes = list(
+            PetChange.objects.filter(id__gt=since).order_by('id')
+                .values_list('id', 'pet_id', 'created_at')[:self.changes_page_size]
+        )
+        has_more = len(changes) == self.changes_page_size
+
+        # Changes stop before the first recent one, lower ids of it might still be uncommitted
+        safe_until = PetChange.safe_until()
+        recent = next((i for i, (_, _, created_at) in enumerate(changes) if created_at > safe_until), None)
+        if recent is not None:
+            changes, has_more = changes[:recent], False
+
+        pet_ids = {pet_id for _, pet_id, _ in changes}
+
+        results = {
+            'cursor': changes[-1][0] if changes else since,
+            'has_more': has_more,
+            'resync': False,
+        }
+
+        payloads = PetPayloadCache(self.serializer_class, self.get_serializer_context(), self.values_serialization)
+        versions = list(payloads.versions(Pet.available.filter(id__any=pet_ids))) if pet_ids else []
+        available_pet_ids = {pet_id for pet_id, _, _ in versions}
+
+        self._add_pets(results, payloads.serialize_versions(Pet, versions))
+
+        # Changed pets which are not available anymore, clients should remove them
+        results['removed'] = sorted(pet_ids - available_pet_ids)
+
+        return Response(results)
+
+    def _snapshot(self) -> Response:
+        # Cursor is taken before reading pets, changes made while reading are returned by the next request
+        results = {
+            'cursor': PetChange.snapshot_cursor(),
+            'has_more': False,
+            'resync': True,
+        }
+
+        payloads = PetPayloadCache(self.serializer_class, self.get_serializer_context(), self.values_serialization)
+        self._add_pets(results, payloads.serialize_versions(Pet, payloads.versions(Pet.available.order_by('-pk'))))
+        results['removed'] = []
+
+        return Response(results)
+
+    def _add_pets(self, results: dict, pets: List[dict]) -> None:
+        if self.normalized:
+            pets, results['shelters'] = self.normalize_shelters(pets)
+
+        results.update(_split_by_pet_type(pets))
+
+
+@method_decorator(name='get', decorator=swagger_auto_schema(
+    operation_description="Returns pets liked by the user, most recently liked first. Continue with the returned "
+                          "next link.",
+    manual_parameters=[SparseFieldsMixin.fields_parameter, NormalizedSheltersMixin.normalized_parameter],
+))
+class FavoritePetsListView(VaryOnAcceptMixin, SparseFieldsMixin, NormalizedSheltersMixin, ListAPIView):
+    serializer_class = PetFlatListSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = FavoritePetsPagination
+    renderer_classes = (FastJSONRenderer, MessagePackRenderer)
+    values_serialization = True
+    filter_backends = ()
+
+    def get_queryset(self):
+        # Choices are paged by id in (user, is_favorite, -id) index, rows carry pet versions for payload cache
+        return UserPetChoice.objects.filter(user=self.request.user, is_favorite=True).order_by('-id').values_list(
+            'id', 'pet_id', 'pet__updated_at', 'pet__shelter__updated_at', 'pet__shelter__region__updated_at',
+            'pet__shelter__region__country__updated_at')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        payloads = PetPayloadCache(self.serializer_class, self.get_serializer_context(), self.values_serialization)
+
+        data = payloads.serialize_versions(Pet, [version for _, *version in page])
+
+        if not self.normalized:
+            return self.get_paginated_response(data)
+
+        data, shelters = self.normalize_shelters(data)
+        response = self.get_paginated_response(data)
+        response.data['shelters'] = shelters
+
+        return response
 
 
 @method_decorator(name='post', decorator=swagger_auto_schema(
-    operation_description="Generated pets to swipe.",
+    operation_description="Generated pets to swipe. When limit is given, returns object with results and cursor "
+                          "which continues the same generated pets deck. Normalized response is an object with "
+                          "results and shelters.",
     security=[],
     request_body=GeneratePetsRequestSerializer,
+    manual_parameters=[SparseFieldsMixin.fields_parameter, NormalizedSheltersMixin.normalized_parameter],
     responses={
         status.HTTP_200_OK: openapi.Response(
             description="Returns generated pets list.",
@@ -78,38 +249,220 @@ class SelectedPetsListView(ObjectMultipleModelAPIView):
         )
     }
 ))
-class PetGenerateListView(ApiLoggingMixin, CreateAPIView, ListModelMixin):
+class PetGenerateListView(VaryOnAcceptMixin, ApiLoggingMixin, SparseFieldsMixin, NormalizedSheltersMixin,
+                          CreateAPIView, ListModelMixin):
     serializer_class = PetFlatListSerializer
     pagination_class = None
     permission_classes = (AllowAny,)
+    renderer_classes = (FastJSONRenderer, MessagePackRenderer)
+    values_serialization = True
+    logging_sample_rate = 0.1
 
-    def get_queryset(self):
+    @cached_property
+    def generate_request(self):
         serializer = GeneratePetsRequestSerializer(data=self.request.data)
         serializer.is_valid(raise_exception=True)
 
-        pet_type = PetType(serializer.data['pet_type'])
+        validated_data = serializer.validated_data
+        validated_data['pet_type'] = validated_data.get('pet_type') or PetType.DOG
+
+        if settings.PET_CHOICES_WRITE_BEHIND and self.request.user.is_authenticated:
+            # Buffered choices are not in database yet
+            validated_data['seen_pets'] = set(validated_data['seen_pets']).union(
+                PetChoiceBuffer.pending(self.request.user.pk))
+
+        return validated_data
+
+    @cached_property
+    def load_pet_relations(self) -> bool:
+        # Values serialization reads pets by id, instances are serialized only without it. Of selected fields only
+        # shelter and profile photos read relations
+        fields = self.selected_fields or self.serializer_class.Meta.fields
+        return not self.values_serialization and bool({'shelter', 'profile_photos'}.intersection(fields))
+
+    def get_queryset(self):
+        pets = self._pets_from_user_deck()
+        if pets:
+            return pets
 
         return Dog.generate_pets(
-            liked_pet_ids=serializer.data['liked_pets'],
-            disliked_pet_ids=serializer.data['disliked_pets'],
-            region=serializer.data['region_code'],
-            pet_type=pet_type
+            liked_pet_ids=self.generate_request['liked_pets'],
+            disliked_pet_ids=self.generate_request['disliked_pets'],
+            seen_pet_ids=self.generate_request['seen_pets'],
+            location=self.generate_request['location'],
+            max_distance_km=self.generate_request.get('max_distance_km'),
+            recommended=self.generate_request['recommended'],
+            age_min=self.generate_request.get('age_min'),
+            age_max=self.generate_request.get('age_max'),
+            pet_size=self.generate_request.get('size'),
+            gender=self.generate_request.get('gender'),
+            region=self.generate_request.get('region_code'),
+            pet_type=self.generate_request['pet_type'],
+            user=self.request.user,
+            load_relations=self.load_pet_relations,
         )
 
+    def _pets_from_user_deck(self):
+        # Precomputed decks are not filtered, filtered requests are generated on request
+        filter_keys = ('region_code', 'location', 'max_distance_km', 'age_min', 'age_max', 'size', 'gender')
+        if not self.request.user.is_authenticated or self.generate_request['recommended'] or any(
+                self.generate_request.get(key) is not None for key in filter_keys):
+            return None
+
+        pet_type = self.generate_request['pet_type']
+        pet_ids = UserPetDeck.pop(self.request.user, pet_type, GENERATE_PETS_DECK_SIZE)
+        if pet_ids is None:
+            return None
+
+        excluded_pet_ids = set(self.generate_request['liked_pets']).union(
+            self.generate_request['disliked_pets'], self.generate_request['seen_pets'])
+        pet_ids = [pet_id for pet_id in pet_ids if pet_id not in excluded_pet_ids]
+
+        queryset = (Cat if pet_type == PetType.CAT else Dog).available.all()
+        if self.load_pet_relations:
+            queryset = queryset.prefetch_related('profile_photos').select_related_full_shelter()
+
+        pets = queryset.in_bulk(pet_ids)
+
+        return [pets[pet_id] for pet_id in pet_ids if pet_id in pets]
+
+    def list(self, request, *args, **kwargs):
+        payloads = PetPayloadCache(self.serializer_class, self.get_serializer_context(), self.values_serialization)
+
+        limit = self.generate_request.get('limit')
+        if limit is None:
+            pets = payloads.serialize_pets(self.get_queryset())
+
+            if not self.normalized:
+                return Response(pets)
+
+            pets, shelters = self.normalize_shelters(pets)
+            return Response({'results': pets, 'shelters': shelters})
+
+        pet_type = self.generate_request['pet_type']
+        cursor = self.generate_request.get('cursor')
+        deck = PetDeck.load(cursor, pet_type) if cursor else None
+
+        if deck is None:
+            pets = self.get_queryset()
+            deck = PetDeck(pet_type=pet_type, pet_ids=[pet.pk for pet in pets[limit:]])
+            results = payloads.serialize_pets(pets[:limit])
+        else:
+            # Deck was generated before the request, pets excluded by it or chosen by user since are skipped
+            excluded_pet_ids = set(self.generate_request['liked_pets']).union(
+                self.generate_request['disliked_pets'], self.generate_request['seen_pets'])
+            pet_ids = [pet_id for pet_id in deck.pop(limit) if pet_id not in excluded_pet_ids]
+
+            model = Cat if pet_type == PetType.CAT else Dog
+            queryset = model.available.filter(id__any=pet_ids)
+            if request.user.is_authenticated:
+                queryset = queryset.exclude_chosen_by_user(request.user)
+
+            versions = {version[0]: version for version in payloads.versions(queryset)}
+            results = payloads.serialize_versions(model, [versions[pet_id] for pet_id in pet_ids if pet_id in versions])
+
+        data = {
+            'cursor': deck.save(),
+            'results': results,
+        }
+        if self.normalized:
+            data['results'], data['shelters'] = self.normalize_shelters(results)
+
+        return Response(data)
+
     def post(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
 
+@method_decorator(name='post', decorator=swagger_auto_schema(
+    operation_description="Data for the app home screen in one request: countries with regions, generated pets "
+                          "the same as from pets generate endpoint and favorite pets. Favorites are liked_pets and "
+                          "pets liked by authenticated user, up to a page of each. Next link of favorites continues "
+                          "from favorite pets endpoint.",
+    security=[],
+    request_body=GeneratePetsRequestSerializer,
+    manual_parameters=[SparseFieldsMixin.fields_parameter, NormalizedSheltersMixin.normalized_parameter],
+    responses={
+        status.HTTP_200_OK: openapi.Response(
+            description="Returns regions, generated pets and favorite pets.",
+            schema=BootstrapSerializer
+        )
+    }
+))
+class BootstrapView(PetGenerateListView):
+    # Parts share request connection and are computed one after another, app saves the round trips
+    def list(self, request, *args, **kwargs):
+        countries = CountriesAndRegionsListView.queryset.all()
+
+        return Response({
+            'regions': CountryWithRegionSerializer(countries, many=True, context=self.get_serializer_context()).data,
+            'pets': super().list(request, *args, **kwargs).data,
+            'favorites': self._favorite_pets(),
+        })
+
+    def _favorite_pets(self) -> dict:
+        # Only the first page of favorites, the app continues from next link of favorite pets endpoint
+        page_size = FavoritePetsPagination.page_size
+
+        pet_ids = set(self.generate_request['liked_pets'][:page_size])
+        next_link = None
+        if self.request.user.is_authenticated:
+            choices = list(
+                UserPetChoice.objects.filter(user=self.request.user, is_favorite=True).order_by('-id').values_list(
+                    'id', 'pet_id')[:page_size + 1]
+            )
+            if len(choices) > page_size:
+                choices = choices[:page_size]
+                next_link = replace_query_param(
+                    self.request.build_absolute_uri(reverse('api_favorite_pets')), 'cursor', choices[-1][0])
+
+            pet_ids.update(pet_id for _, pet_id in choices)
+
+        if settings.PET_CHOICES_WRITE_BEHIND and self.request.user.is_authenticated:
+            for pet_id, is_favorite in PetChoiceBuffer.pending(self.request.user.pk).items():
+                if is_favorite:
+                    pet_ids.add(pet_id)
+                else:
+                    pet_ids.discard(pet_id)
+
+        payloads = PetPayloadCache(self.serializer_class, self.get_serializer_context(), self.values_serialization)
+        versions = payloads.versions(Pet.objects.filter(id__any=pet_ids).order_by('-pk')) if pet_ids else []
+        pets = payloads.serialize_versions(Pet, versions)
+
+        if not self.normalized:
+            return dict(_split_by_pet_type(pets), next=next_link)
+
+        pets, shelters = self.normalize_shelters(pets)
+        return dict(_split_by_pet_type(pets), shelters=shelters, next=next_link)
+
+
 @method_decorator(name='put', decorator=swagger_auto_schema(
     operation_description="Saves pet choice on swipe.",
 ))
 class UserPetChoiceView(ApiLoggingMixin, UpdateAPIView):
     serializer_class = UserPetChoiceSerializer
     permission_classes = (IsAuthenticated,)
+    logging_sample_rate = 0.1
+
+    def update(self, request, *args, **kwargs):
+        if not settings.PET_CHOICES_WRITE_BEHIND:
+            return super().update(request, *args, **kwargs)
+
+        # Choice is saved to database later in a batch, pet existence is checked then
+        serializer = UserPetChoiceItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        pet_id, is_favorite = serializer.validated_data['pet'], serializer.validated_data['is_favorite']
+        PetChoiceBuffer.append(request.user.pk, pet_id, is_favorite)
+        UserPetDeck.remove(request.user, pet_id)
+
+        return Response(serializer.data)
 
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
 
+        UserPetDeck.remove(self.request.user, serializer.instance.pet_id)
+
     def get_object(self):
         return UserPetChoice.objects.filter(
             user=self.request.user,
@@ -117,6 +470,35 @@ class UserPetChoiceView(ApiLoggingMixin, UpdateAPIView):
         ).first()
 
 
+@method_decorator(name='post', decorator=swagger_auto_schema(
+    operation_description="Saves a batch of pet choices queued on the device. Later choices of the same pet win and "
+                          "retried batches leave the same state. Returns ids of pets whose choices were saved, choices "
+                          "of deleted pets are skipped. With write-behind choices are saved a bit later and all of "
+                          "them are returned.",
+    request_body=UserPetChoiceItemSerializer(many=True),
+))
+class UserPetChoicesView(ApiLoggingMixin, GenericAPIView):
+    serializer_class = UserPetChoiceItemSerializer
+    permission_classes = (IsAuthenticated,)
+    max_choices = 500
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False, max_length=self.max_choices)
+        serializer.is_valid(raise_exception=True)
+
+        choices = {choice['pet']: choice['is_favorite'] for choice in serializer.validated_data}
+        if settings.PET_CHOICES_WRITE_BEHIND:
+            # Saved to database later in a batch, after choices buffered before, pet existence is checked then
+            PetChoiceBuffer.append_many(request.user.pk, choices)
+            pet_ids = list(choices)
+        else:
+            pet_ids = UserPetChoice.upsert(request.user.pk, choices)
+
+        UserPetDeck.remove(request.user, *pet_ids)
+
+        return Response({'saved_pets': sorted(pet_ids)})
+
+
 @method_decorator(name='put', decorator=swagger_auto_schema(
     operation_description="Saves shelter pet request.",
 ))
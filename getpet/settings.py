@@ -58,7 +58,6 @@ INSTALLED_APPS = [
     'django_filters',
     'drf_yasg',
     'rest_framework_tracking',
-    'drf_multiple_model',
 
     'crispy_forms',
     'adminsortable2',
@@ -279,6 +278,26 @@ FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
 REDIS_URL = 'redis://%s:6379/' % os.environ.get('REDIS_PORT_6379_TCP_ADDR', '172.17.0.1')
 
 CELERY_BROKER_URL = REDIS_URL + '2'
+
+# Pet changes feed is kept this long, clients with older cursors get all pets again
+PET_CHANGES_RETENTION_DAYS = 30
+
+# Unseen pets of users are kept in Redis lists refilled in background, generate requests take pets from them
+USER_PET_DECKS = not DEBUG
+USER_PET_DECKS_REDIS_URL = REDIS_URL + '3'
+
+# Optional write-behind mode of swipes: choices are appended to Redis stream and saved to database in batches
+PET_CHOICES_WRITE_BEHIND = os.environ.get('PET_CHOICES_WRITE_BEHIND') == '1'
+PET_CHOICES_BUFFER_REDIS_URL = REDIS_URL + '3'
+
+# API request logs are queued in Redis and saved in batches by flush_api_request_logs task instead of on request
+API_LOGGING_BUFFERED = not DEBUG
+API_LOGGING_BUFFER_REDIS_URL = REDIS_URL + '3'
+# Requests slower than this are logged regardless of view sampling rate
+API_LOGGING_SLOW_REQUEST_MS = 1000
+# API request logs are kept in daily partitions, partitions older than this are dropped
+API_REQUEST_LOG_RETENTION_DAYS = 30
+
 CELERY_RESULT_BACKEND = 'django-db'
 
 CELERY_ACCEPT_CONTENT = ['application/json']
@@ -299,12 +318,44 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'web.tasks.randomize_pets_order',
         'schedule': crontab(hour='4')
     },
+    'randomize_pets_random_keys': {
+        'task': 'web.tasks.randomize_pets_random_keys',
+        'schedule': crontab(minute=0, hour='4', day_of_week='1')
+    },
     'randomize_shelters_order': {
         'task': 'web.tasks.randomize_shelters_order',
         'schedule': crontab(hour='4')
     },
+    'compute_pet_similarities': {
+        'task': 'web.tasks.compute_pet_similarities',
+        'schedule': crontab(minute=0, hour='3')
+    },
+    'rebuild_seen_pets_filters': {
+        'task': 'web.tasks.rebuild_seen_pets_filters',
+        'schedule': crontab(minute=0, hour='5')
+    },
+    'delete_expired_pet_changes': {
+        'task': 'web.tasks.delete_expired_pet_changes',
+        'schedule': crontab(minute=30, hour='2')
+    },
+    'maintain_api_request_log_partitions': {
+        'task': 'web.tasks.maintain_api_request_log_partitions',
+        'schedule': crontab(minute=0, hour='2')
+    },
 }
 
+if API_LOGGING_BUFFERED:
+    CELERY_BEAT_SCHEDULE['flush_api_request_logs'] = {
+        'task': 'web.tasks.flush_api_request_logs',
+        'schedule': timedelta(seconds=10)
+    }
+
+if PET_CHOICES_WRITE_BEHIND:
+    CELERY_BEAT_SCHEDULE['flush_pet_choice_buffer'] = {
+        'task': 'web.tasks.flush_pet_choice_buffer',
+        'schedule': timedelta(seconds=5)
+    }
+
 CELERYD_TASK_SOFT_TIME_LIMIT = 45 * 60
 CELERYD_SEND_EVENTS = True
 
@@ -344,6 +395,13 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
+        'api.renderers.MessagePackRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -0,0 +1,51 @@
+import math
+from typing import Iterable
+
+import numpy as np
+
+_HASH_MULTIPLIER_1 = np.uint64(0x9E3779B97F4A7C15)
+_HASH_MULTIPLIER_2 = np.uint64(0xC2B2AE3D27D4EB4F)
+_HASH_SHIFT = np.uint64(32)
+
+
+class BloomFilter:
+    """Set of integers in a fixed size bit array: no false negatives and false positive rate bounded by
+    error_rate while no more than capacity values are added."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.count = 0
+
+        self.bits_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes_count = max(1, round(self.bits_count / capacity * math.log(2)))
+        self.bits = np.zeros((self.bits_count + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, values: Iterable[int]) -> np.ndarray:
+        values = np.fromiter(values, dtype=np.int64).astype(np.uint64)
+
+        # Double hashing, k positions are derived from two independent hashes
+        with np.errstate(over='ignore'):
+            hash1 = values * _HASH_MULTIPLIER_1
+            hash1 ^= hash1 >> _HASH_SHIFT
+            hash2 = (values + _HASH_MULTIPLIER_1) * _HASH_MULTIPLIER_2
+            hash2 ^= hash2 >> _HASH_SHIFT
+
+            positions = hash1[:, None] + np.arange(self.hashes_count, dtype=np.uint64)[None, :] * hash2[:, None]
+
+        return positions % np.uint64(self.bits_count)
+
+    def add(self, values: Iterable[int]) -> None:
+        positions = self._positions(values).ravel()
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+        self.count += len(positions) // self.hashes_count
+
+    def contains_many(self, values: Iterable[int]) -> np.ndarray:
+        positions = self._positions(values)
+
+        return ((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+
+    def __contains__(self, value: int) -> bool:
+        return bool(self.contains_many([value])[0])
@@ -0,0 +1,24 @@
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Lookup
+
+
+class AnyLookup(Lookup):
+    """Matches integer against list of values passed as a single array parameter instead of IN (%s, %s, ...)."""
+    lookup_name = 'any'
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        return [int(value) for value in self.rhs]
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+
+        if not self.rhs:
+            raise EmptyResultSet
+
+        if connection.vendor == 'postgresql':
+            return f'{lhs} = ANY(%s)', lhs_params + [self.rhs]
+
+        # Other databases don't support array parameters
+        placeholders = ', '.join(['%s'] * len(self.rhs))
+        return f'{lhs} IN ({placeholders})', lhs_params + self.rhs
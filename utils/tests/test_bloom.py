@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase
+
+from utils.bloom import BloomFilter
+
+
+class BloomFilterTest(SimpleTestCase):
+
+    def test_added_values_are_contained(self):
+        bloom = BloomFilter(capacity=1000)
+        bloom.add(range(0, 2000, 2))
+
+        self.assertTrue(bloom.contains_many(range(0, 2000, 2)).all())
+        self.assertEqual(bloom.count, 1000)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+        bloom.add(range(10_000))
+
+        false_positive_rate = bloom.contains_many(range(10_000, 110_000)).mean()
+
+        self.assertLess(false_positive_rate, 0.02)
+
+    def test_empty_filter(self):
+        bloom = BloomFilter(capacity=100)
+
+        self.assertNotIn(1, bloom)
+        self.assertEqual(len(bloom.contains_many([])), 0)
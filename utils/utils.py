@@ -1,3 +1,4 @@
+import functools
 import logging
 import time
 from datetime import datetime
@@ -6,6 +7,7 @@ from typing import List, Optional, Union
 from urllib.parse import ParseResult, parse_qsl, unquote, urlencode, urljoin, urlparse
 
 import datadog
+import redis
 from django.contrib.sitemaps.views import sitemap, x_robots_tag
 from django.core.paginator import Page, Paginator
 from django.utils.timezone import now
@@ -28,6 +30,12 @@ def django_now() -> datetime:
     return now()
 
 
+@functools.lru_cache()
+def redis_client(url: str) -> redis.Redis:
+    # Connection pool is shared by all calls in the process
+    return redis.Redis.from_url(url)
+
+
 class PageEntry(object):
     pass
 
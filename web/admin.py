@@ -1,3 +1,4 @@
+from datetime import timedelta
 from typing import Any
 
 from adminsortable2.admin import SortableAdminMixin, SortableInlineAdminMixin
@@ -10,8 +11,11 @@ from django.db.models.base import Model
 from django.http.request import HttpRequest
 from django.utils.translation import gettext_lazy as _
 from mapwidgets import GooglePointFieldWidget
+from rest_framework_tracking.admin import APIRequestLogAdmin as BaseAPIRequestLogAdmin
+from rest_framework_tracking.models import APIRequestLog
 
 from getpet import settings
+from utils.utils import django_now
 from web.models import Cat, CatProperty, Country, Dog, DogProperty, GetPetRequest, Mentor, Pet, PetProfilePhoto, Region, \
     Shelter, \
     TeamMember, \
@@ -262,3 +266,25 @@ class TeamMemberAdmin(SortableAdminMixin, admin.ModelAdmin):
 @admin.register(Mentor)
 class MentorAdmin(SortableAdminMixin, admin.ModelAdmin):
     list_display = ['name', 'photo', ]
+
+
+admin.site.unregister(APIRequestLog)
+
+
+@admin.register(APIRequestLog)
+class APIRequestLogAdmin(BaseAPIRequestLogAdmin):
+    # Log table is partitioned by request time, queries filter by requested_at range so only its partitions are read
+    show_full_result_count = False
+    chart_days = 30
+
+    def changelist_view(self, request, extra_context=None):
+        today = django_now().date()
+        chart_data = self.chart_data(today - timedelta(days=self.chart_days - 1), today)
+
+        return super().changelist_view(request, extra_context={'chart_data': list(chart_data), **(extra_context or {})})
+
+    def chart_data(self, start_date, end_date):
+        return super().chart_data(start_date, end_date).filter(
+            requested_at__gte=start_date,
+            requested_at__lt=end_date + timedelta(days=1),
+        )
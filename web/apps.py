@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 
 class WebConfig(AppConfig):
     name = 'web'
     verbose_name = _("Gyvūnų prieglaudų platforma")
+
+    def ready(self):
+        from utils.lookups import AnyLookup
+
+        models.IntegerField.register_lookup(AnyLookup)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from typing import Iterable, List, Optional
+
+import numpy as np
+from django.core.cache import cache
+
+from utils.bloom import BloomFilter
+from web.models import Pet, PetType
+
+_PET_TYPE_CODES = {
+    PetType.DOG: 1,
+    PetType.CAT: 2,
+}
+
+
+class PetCatalog:
+    """Per process columnar snapshot of available pets used to filter and sample generated pets without database.
+
+    Snapshot is reloaded when version stored in shared cache changes. Version is changed when pets or shelters are
+    created or deleted, or fields in PET_CATALOG_FIELDS and SHELTER_CATALOG_FIELDS change, also by queryset update().
+    """
+    VERSION_CACHE_KEY = 'pet-catalog-version'
+
+    _current: Optional[PetCatalog] = None
+    _lock = threading.Lock()
+
+    def __init__(self, version: str, ids: np.ndarray, pet_types: np.ndarray, shelter_ids: np.ndarray,
+                 region_ids: np.ndarray, ages: np.ndarray, sizes: np.ndarray, genders: np.ndarray):
+        self.version = version
+        self.ids = ids
+        self.pet_types = pet_types
+        self.shelter_ids = shelter_ids
+        self.region_ids = region_ids
+        self.ages = ages
+        self.sizes = sizes
+        self.genders = genders
+
+    @classmethod
+    def load(cls, version: str) -> PetCatalog:
+        rows = list(
+            Pet.available.order_by().values_list(
+                'id', 'dog__pet_ptr', 'cat__pet_ptr', 'shelter_id', 'shelter__region_id', 'age', 'dog__size', 'gender'
+            )
+        )
+
+        return cls(
+            version=version,
+            ids=np.array([row[0] for row in rows], dtype=np.int64),
+            pet_types=np.array([
+                _PET_TYPE_CODES[PetType.DOG] if row[1] else _PET_TYPE_CODES[PetType.CAT] if row[2] else 0
+                for row in rows
+            ], dtype=np.int8),
+            shelter_ids=np.array([row[3] for row in rows], dtype=np.int64),
+            region_ids=np.array([row[4] for row in rows], dtype=np.int64),
+            ages=np.array([row[5] for row in rows], dtype=np.int16),
+            sizes=np.array([row[6] or 0 for row in rows], dtype=np.int8),
+            genders=np.array([row[7] or 0 for row in rows], dtype=np.int8),
+        )
+
+    @classmethod
+    def current(cls) -> PetCatalog:
+        version = cache.get(cls.VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(cls.VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(cls.VERSION_CACHE_KEY)
+
+        with cls._lock:
+            if cls._current is None or cls._current.version != version:
+                cls._current = cls.load(version)
+
+            return cls._current
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cache.set(cls.VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+    def sample(self, pet_type: PetType, size: int, region_id: Optional[int] = None,
+               excluded_pet_ids: Iterable[int] = (), age_min: Optional[int] = None, age_max: Optional[int] = None,
+               pet_size: Optional[int] = None, gender: Optional[int] = None,
+               excluded_pets_filter: Optional[BloomFilter] = None) -> List[int]:
+        mask = self.pet_types == _PET_TYPE_CODES[pet_type]
+
+        if region_id is not None:
+            mask &= self.region_ids == region_id
+        if age_min is not None:
+            mask &= self.ages >= age_min
+        if age_max is not None:
+            mask &= self.ages <= age_max
+        if pet_size is not None:
+            mask &= self.sizes == pet_size
+        if gender is not None:
+            mask &= self.genders == gender
+
+        excluded_pet_ids = np.fromiter(excluded_pet_ids, dtype=np.int64)
+        if len(excluded_pet_ids):
+            mask &= ~np.isin(self.ids, excluded_pet_ids)
+
+        candidates = self.ids[mask]
+        if excluded_pets_filter is not None and len(candidates):
+            candidates = candidates[~excluded_pets_filter.contains_many(candidates)]
+
+        if len(candidates) > size:
+            candidates = np.random.choice(candidates, size, replace=False)
+        else:
+            candidates = np.random.permutation(candidates)
+
+        return candidates.tolist()
@@ -0,0 +1,110 @@
+from typing import Dict, List, Tuple
+
+import redis
+from django.conf import settings
+
+from utils.utils import redis_client
+from web.models import UserPetChoice
+
+StreamEntry = Tuple[bytes, Dict[bytes, bytes]]
+
+
+def _redis() -> redis.Redis:
+    return redis_client(settings.PET_CHOICES_BUFFER_REDIS_URL)
+
+
+class PetChoiceBuffer:
+    """Write-behind buffer of user pet choices in a Redis stream, so swipes don't wait for database writes.
+
+    Buffered choices are saved to database in batches by flush_pet_choice_buffer task. Until then they are also kept
+    per user, so generated pets exclude them.
+    """
+    STREAM_KEY = 'pet-choices'
+    GROUP_NAME = 'flushers'
+    CONSUMER_NAME = 'flusher'
+    PENDING_KEY_PREFIX = 'pet-choices:pending'
+    PENDING_TIMEOUT = 60 * 60
+    FLUSH_LOCK_KEY = 'pet-choices:flush'
+    FLUSH_LOCK_TIMEOUT = 4 * 60
+    FLUSH_BATCH_SIZE = 5000
+    FLUSH_MAX_BATCHES = 20
+
+    @classmethod
+    def _pending_key(cls, user_id: int) -> str:
+        return f"{cls.PENDING_KEY_PREFIX}:{user_id}"
+
+    @classmethod
+    def append(cls, user_id: int, pet_id: int, is_favorite: bool) -> None:
+        cls.append_many(user_id, {pet_id: is_favorite})
+
+    @classmethod
+    def append_many(cls, user_id: int, choices: Dict[int, bool]) -> None:
+        """Buffers user choices by pet id in one round trip, in order, so they win over choices buffered before."""
+        pending_key = cls._pending_key(user_id)
+
+        with _redis().pipeline() as pipeline:
+            for pet_id, is_favorite in choices.items():
+                pipeline.xadd(cls.STREAM_KEY, {'user': user_id, 'pet': pet_id, 'is_favorite': int(is_favorite)})
+            pipeline.hset(pending_key, mapping={pet_id: int(is_favorite) for pet_id, is_favorite in choices.items()})
+            pipeline.expire(pending_key, cls.PENDING_TIMEOUT)
+            pipeline.execute()
+
+    @classmethod
+    def pending(cls, user_id: int) -> Dict[int, bool]:
+        """Buffered choices of user by pet id, kept a while after flush, by then the same choices are in database."""
+        return {
+            int(pet_id): is_favorite == b'1'
+            for pet_id, is_favorite in _redis().hgetall(cls._pending_key(user_id)).items()
+        }
+
+    @staticmethod
+    def coalesce(entries: List[StreamEntry]) -> Dict[Tuple[int, int], bool]:
+        # Entries are in append order, the last choice of user and pet wins
+        return {
+            (int(fields[b'user']), int(fields[b'pet'])): fields[b'is_favorite'] == b'1'
+            for _, fields in entries
+        }
+
+    @classmethod
+    def flush(cls) -> int:
+        """Saves buffered choices to database and removes them from stream. Returns number of flushed entries."""
+        client = _redis()
+
+        lock = client.lock(cls.FLUSH_LOCK_KEY, timeout=cls.FLUSH_LOCK_TIMEOUT)
+        if not lock.acquire(blocking=False):
+            return 0
+
+        try:
+            try:
+                client.xgroup_create(cls.STREAM_KEY, cls.GROUP_NAME, id='0', mkstream=True)
+            except redis.ResponseError as e:
+                if 'BUSYGROUP' not in str(e):
+                    raise
+
+            # Entries read by a flush which failed before acknowledging them are delivered again first
+            stream_id = '0'
+            flushed = 0
+
+            for _ in range(cls.FLUSH_MAX_BATCHES):
+                response = client.xreadgroup(cls.GROUP_NAME, cls.CONSUMER_NAME, {cls.STREAM_KEY: stream_id},
+                                             count=cls.FLUSH_BATCH_SIZE)
+                entries = response[0][1] if response else []
+
+                if not entries:
+                    if stream_id == '>':
+                        break
+
+                    stream_id = '>'
+                    continue
+
+                UserPetChoice.upsert_many(cls.coalesce(entries))
+
+                entry_ids = [entry_id for entry_id, _ in entries]
+                client.xack(cls.STREAM_KEY, cls.GROUP_NAME, *entry_ids)
+                client.xdel(cls.STREAM_KEY, *entry_ids)
+
+                flushed += len(entries)
+
+            return flushed
+        finally:
+            lock.release()
@@ -0,0 +1,142 @@
+from typing import List, Optional, Tuple
+
+import redis
+from django.conf import settings
+
+from utils.utils import redis_client
+from web.models import Dog, PetType, User
+
+
+def _redis() -> redis.Redis:
+    return redis_client(settings.USER_PET_DECKS_REDIS_URL)
+
+
+class UserPetDeck:
+    """Pre-shuffled unseen pet ids of a user kept in a Redis list and refilled in background, off the request path.
+
+    Pets are taken from the head of the list and removed from it when swiped. Taken and removed pets are also kept in
+    a capped excluded list, so refill doesn't add them back. Refill generates pets outside of Redis and appends them
+    in a transaction watching both lists, which is retried when pets were taken or removed meanwhile.
+    """
+    KEY_PREFIX = 'user-pet-deck:v3'
+    TIMEOUT = 24 * 60 * 60
+    SIZE = 300
+    REFILL_THRESHOLD = 100
+    REFILL_LOCK_TIMEOUT = 60
+
+    @classmethod
+    def _key(cls, user_id: int, pet_type: PetType) -> str:
+        return f"{cls.KEY_PREFIX}:{user_id}:{pet_type.value}"
+
+    @classmethod
+    def _excluded_key(cls, user_id: int, pet_type: PetType) -> str:
+        return f"{cls._key(user_id, pet_type)}:excluded"
+
+    @classmethod
+    def _refill_lock_key(cls, user_id: int, pet_type: PetType) -> str:
+        return f"{cls._key(user_id, pet_type)}:refill"
+
+    @classmethod
+    def _exclude(cls, pipeline, excluded_key: str, pet_ids: List[int]) -> None:
+        pipeline.rpush(excluded_key, *pet_ids)
+        pipeline.ltrim(excluded_key, -cls.SIZE, -1)
+        pipeline.expire(excluded_key, cls.TIMEOUT)
+
+    @classmethod
+    def pop(cls, user: User, pet_type: PetType, limit: int) -> Optional[List[int]]:
+        """Takes up to limit pets from the deck. Returns None when user has no deck, refill is scheduled then."""
+        if not settings.USER_PET_DECKS:
+            return None
+
+        key, excluded_key = cls._key(user.pk, pet_type), cls._excluded_key(user.pk, pet_type)
+
+        def take(pipeline) -> Tuple[Optional[List[int]], int]:
+            if not pipeline.exists(key):
+                return None, 0
+
+            pet_ids = [int(pet_id) for pet_id in pipeline.lrange(key, 0, limit - 1)]
+            remaining = pipeline.llen(key) - len(pet_ids)
+
+            pipeline.multi()
+            pipeline.ltrim(key, len(pet_ids), -1)
+            # Taken pets are not swiped yet, so refill has to skip them until they are
+            if pet_ids:
+                cls._exclude(pipeline, excluded_key, pet_ids)
+
+            return pet_ids, remaining
+
+        pet_ids, remaining = _redis().transaction(take, key, value_from_callable=True)
+
+        if pet_ids is None or remaining < cls.REFILL_THRESHOLD:
+            cls._schedule_refill(user, pet_type)
+
+        return pet_ids
+
+    @classmethod
+    def remove(cls, user: User, *pet_ids: int) -> None:
+        if not settings.USER_PET_DECKS or not pet_ids:
+            return
+
+        # Decks of all pet types are changed in one transaction and round trip
+        with _redis().pipeline() as pipeline:
+            for pet_type in PetType:
+                key, excluded_key = cls._key(user.pk, pet_type), cls._excluded_key(user.pk, pet_type)
+
+                for pet_id in pet_ids:
+                    pipeline.lrem(key, 0, pet_id)
+                # Refill in progress might have generated them before they were chosen
+                cls._exclude(pipeline, excluded_key, list(pet_ids))
+
+            pipeline.execute()
+
+    @classmethod
+    def refill(cls, user: User, pet_type: PetType) -> int:
+        """Tops the deck up to SIZE pets. Returns number of added pets."""
+        key, excluded_key = cls._key(user.pk, pet_type), cls._excluded_key(user.pk, pet_type)
+        client = _redis()
+
+        try:
+            with client.pipeline() as pipeline:
+                pipeline.lrange(key, 0, -1)
+                pipeline.lrange(excluded_key, 0, -1)
+                deck_pet_ids, excluded_pet_ids = pipeline.execute()
+
+            size = cls.SIZE - len(deck_pet_ids)
+            pets = Dog.generate_pets(
+                liked_pet_ids=[],
+                disliked_pet_ids=[],
+                seen_pet_ids=[int(pet_id) for pet_id in deck_pet_ids + excluded_pet_ids],
+                region=None,
+                pet_type=pet_type,
+                size=size,
+                user=user,
+                load_relations=False,
+            ) if size > 0 else []
+
+            def append(pipeline) -> List[int]:
+                excluded = {
+                    int(pet_id) for pet_id in pipeline.lrange(key, 0, -1) + pipeline.lrange(excluded_key, 0, -1)
+                }
+                new_pet_ids = [pet.pk for pet in pets if pet.pk not in excluded]
+
+                pipeline.multi()
+                if new_pet_ids:
+                    pipeline.rpush(key, *new_pet_ids)
+                pipeline.expire(key, cls.TIMEOUT)
+
+                return new_pet_ids
+
+            return len(client.transaction(append, key, excluded_key, value_from_callable=True))
+        finally:
+            # Only marks that refill is scheduled, a refill scheduled again after this one expired is harmless
+            client.delete(cls._refill_lock_key(user.pk, pet_type))
+
+    @classmethod
+    def _schedule_refill(cls, user: User, pet_type: PetType):
+        # Only one refill per deck at a time, every request popping below threshold would schedule one otherwise
+        if not _redis().set(cls._refill_lock_key(user.pk, pet_type), 1, nx=True, ex=cls.REFILL_LOCK_TIMEOUT):
+            return
+
+        from web.tasks import refill_user_pet_deck
+
+        refill_user_pet_deck.delay(user.pk, pet_type.value)
@@ -0,0 +1,113 @@
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, List
+
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+from django.utils.text import slugify
+
+from web.catalog import PetCatalog
+from web.models import Country, Dog, Pet, PetGender, PetSize, PetStatus, Region, Shelter
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back_transaction():
+    """Runs benchmark inside transaction which is always rolled back, so no benchmark data is left in database."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+def measure_ms(function: Callable, repeats: int) -> float:
+    """Returns median duration of function call in milliseconds."""
+    function()  # Warm up caches
+
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(durations)
+
+
+def analyze_tables(*models) -> None:
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+
+def create_benchmark_shelter(name: str = "Benchmark shelter", location: Point = None) -> Shelter:
+    country, _ = Country.objects.get_or_create(code='lt', defaults={'name': "Lithuania"})
+    region, _ = Region.objects.get_or_create(code=slugify(name), defaults={
+        'name': name,
+        'full_name': name,
+        'country': country,
+    })
+
+    return Shelter.objects.create(
+        name=name,
+        is_published=True,
+        square_logo='benchmark.png',
+        region=region,
+        address=name,
+        location=location or Point(25.279652, 54.687157),
+        email='benchmark@getpet.lt',
+        phone='+37060000000',
+    )
+
+
+def create_benchmark_dogs(shelter: Shelter, count: int, batch_size: int = 5000) -> List[int]:
+    """Bulk creates dogs bypassing Pet.save, as bulk_create does not support multi-table inheritance. Pet catalog is
+    invalidated the same as Pet.save would, so generated pets are sampled from all created dogs."""
+    pet_ids: List[int] = []
+    dog_table = Dog._meta.db_table
+    pet_ptr_column = Dog._meta.get_field('pet_ptr').column
+
+    for offset in range(0, count, batch_size):
+        pets = Pet.objects.bulk_create([
+            Pet(
+                name=f"Benchmark {i}",
+                slug=f"benchmark-{i}",
+                photo='benchmark.png',
+                shelter=shelter,
+                status=PetStatus.AVAILABLE,
+                short_description="Benchmark pet",
+                description="Benchmark pet description",
+                gender=PetGender.Male if i % 2 else PetGender.Female,
+                age=i % 15,
+                weight=i % 40,
+                desexed=bool(i % 3),
+            ) for i in range(offset, min(offset + batch_size, count))
+        ])
+        batch_ids = [pet.pk for pet in pets]
+
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {dog_table} ({pet_ptr_column}, size) VALUES (%s, %s)',
+                [(pet_id, PetSize.Medium) for pet_id in batch_ids]
+            )
+
+        pet_ids += batch_ids
+
+    PetCatalog.invalidate()
+
+    return pet_ids
+
+
+def print_table(stdout, header: List[str], rows: List[List]) -> None:
+    widths = [max(len(str(value)) for value in column) for column in zip(header, *rows)]
+
+    for row in [header] + rows:
+        stdout.write("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
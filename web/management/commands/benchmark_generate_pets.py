@@ -0,0 +1,47 @@
+from django.core.management import BaseCommand
+
+from web.management.commands._private import analyze_tables, create_benchmark_dogs, create_benchmark_shelter, \
+    measure_ms, print_table, rolled_back_transaction
+from web.catalog import PetCatalog
+from web.models import Dog, GENERATE_PETS_DECK_SIZE, Pet, PetType
+
+
+class Command(BaseCommand):
+    help = "Compares Dog.generate_pets latency against ORDER BY RANDOM() with growing number of available pets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1_000, 10_000, 100_000, 500_000])
+        parser.add_argument('--repeats', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows = []
+
+        with rolled_back_transaction():
+            shelter = create_benchmark_shelter()
+            created = 0
+
+            for size in sorted(options['sizes']):
+                create_benchmark_dogs(shelter, size - created)
+                created = size
+                analyze_tables(Pet, Dog)
+
+                # Paid by the first generate_pets call in each process after pets change, measured separately
+                catalog_load_ms = measure_ms(lambda: PetCatalog.load('benchmark'), options['repeats'])
+
+                order_by_random_ms = measure_ms(
+                    lambda: list(
+                        Dog.available.prefetch_related('profile_photos', 'properties')
+                            .select_related_full_shelter()
+                            .order_by('?')[:GENERATE_PETS_DECK_SIZE]
+                    ),
+                    options['repeats']
+                )
+                generate_pets_ms = measure_ms(
+                    lambda: Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], region=None,
+                                              pet_type=PetType.DOG),
+                    options['repeats']
+                )
+
+                rows.append([size, f"{order_by_random_ms:.2f}", f"{generate_pets_ms:.2f}", f"{catalog_load_ms:.2f}"])
+
+        print_table(self.stdout, ["Pets", "ORDER BY RANDOM() ms", "generate_pets ms", "Catalog load ms"], rows)
@@ -0,0 +1,60 @@
+import random
+
+from django.contrib.gis.geos import Point
+from django.core.management import BaseCommand
+
+from web.management.commands._private import analyze_tables, create_benchmark_dogs, create_benchmark_shelter, \
+    measure_ms, print_table, rolled_back_transaction
+from web.catalog import PetCatalog
+from web.models import Dog, Pet, PetType, Shelter
+
+
+class Command(BaseCommand):
+    help = "Compares Dog.generate_pets latency filtered by region against filtering and ranking by user location."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shelters', type=int, default=100)
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1_000, 10_000, 100_000])
+        parser.add_argument('--max-distance-km', type=float, default=50)
+        parser.add_argument('--repeats', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows = []
+        user_location = Point(25.279652, 54.687157, srid=4326)
+
+        with rolled_back_transaction():
+            shelters = [
+                create_benchmark_shelter(
+                    name=f"Benchmark shelter {i}",
+                    location=Point(random.uniform(21.0, 26.8), random.uniform(54.0, 56.4), srid=4326),
+                ) for i in range(options['shelters'])
+            ]
+            region = Shelter.objects.order_by_distance(user_location).first().region
+            created = 0
+
+            for size in sorted(options['sizes']):
+                pets_per_shelter = (size - created) // len(shelters)
+                for shelter in shelters:
+                    create_benchmark_dogs(shelter, pets_per_shelter)
+                created = size
+                analyze_tables(Pet, Dog, Shelter)
+
+                # Paid by the first generate_pets call in each process after pets change, measured separately
+                catalog_load_ms = measure_ms(lambda: PetCatalog.load('benchmark'), options['repeats'])
+
+                def generate(**kwargs):
+                    return Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], pet_type=PetType.DOG, **kwargs)
+
+                region_ms = measure_ms(lambda: generate(region=region), options['repeats'])
+                nearest_ms = measure_ms(lambda: generate(region=None, location=user_location), options['repeats'])
+                within_ms = measure_ms(
+                    lambda: generate(region=None, location=user_location,
+                                     max_distance_km=options['max_distance_km']),
+                    options['repeats']
+                )
+
+                rows.append([
+                    size, f"{region_ms:.2f}", f"{nearest_ms:.2f}", f"{within_ms:.2f}", f"{catalog_load_ms:.2f}",
+                ])
+
+        print_table(self.stdout, ["Pets", "Region ms", "Nearest ms", "Within distance ms", "Catalog load ms"], rows)
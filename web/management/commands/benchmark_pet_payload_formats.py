@@ -0,0 +1,43 @@
+import gzip
+
+from django.core.management import BaseCommand
+
+from api.renderers import FastJSONRenderer, MessagePackRenderer
+from api.serializers import PetValuesSerializer
+from web.management.commands._private import analyze_tables, create_benchmark_dogs, create_benchmark_shelter, \
+    measure_ms, print_table, rolled_back_transaction
+from web.models import Dog, Pet
+
+
+class Command(BaseCommand):
+    help = "Compares payload size and encode time of pet lists rendered as JSON and as MessagePack."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100, 500, 2_000])
+        parser.add_argument('--repeats', type=int, default=10)
+
+    def handle(self, *args, **options):
+        rows = []
+
+        with rolled_back_transaction():
+            shelter = create_benchmark_shelter()
+            pet_ids = create_benchmark_dogs(shelter, max(options['sizes']))
+            analyze_tables(Pet, Dog)
+
+            for size in sorted(options['sizes']):
+                data = {'results': list(PetValuesSerializer({}).to_representations(pet_ids[:size]).values())}
+
+                row = [size]
+                for renderer in (FastJSONRenderer(), MessagePackRenderer()):
+                    payload = renderer.render(data)
+
+                    row += [
+                        f"{len(payload) / size:.0f}",
+                        f"{len(gzip.compress(payload)) / size:.0f}",
+                        f"{measure_ms(lambda: renderer.render(data), options['repeats']) * 1000 / size:.1f}",
+                    ]
+
+                rows.append(row)
+
+        print_table(self.stdout, ["Pets", "JSON B/pet", "JSON gzip B/pet", "JSON µs/pet", "MessagePack B/pet",
+                                  "MessagePack gzip B/pet", "MessagePack µs/pet"], rows)
@@ -0,0 +1,51 @@
+from django.core.management import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+from api.serializers import PetFlatListSerializer, PetValuesSerializer
+from web.management.commands._private import analyze_tables, create_benchmark_dogs, create_benchmark_shelter, \
+    measure_ms, print_table, rolled_back_transaction
+from web.models import Dog, Pet
+
+
+class Command(BaseCommand):
+    help = "Compares per pet CPU cost of PetFlatListSerializer with JSONRenderer against PetValuesSerializer " \
+           "with FastJSONRenderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100, 500, 2_000])
+        parser.add_argument('--repeats', type=int, default=10)
+
+    def handle(self, *args, **options):
+        rows = []
+
+        with rolled_back_transaction():
+            shelter = create_benchmark_shelter()
+            pet_ids = create_benchmark_dogs(shelter, max(options['sizes']))
+            analyze_tables(Pet, Dog)
+
+            for size in sorted(options['sizes']):
+                ids = pet_ids[:size]
+
+                def serialize_instances():
+                    pets = Dog.objects.prefetch_related('profile_photos') \
+                        .select_related_full_shelter() \
+                        .filter(id__any=ids)
+                    return PetFlatListSerializer(pets, many=True, context={}).data
+
+                def serialize_values():
+                    return list(PetValuesSerializer({}).to_representations(ids).values())
+
+                data = serialize_instances()
+
+                timings = [
+                    measure_ms(serialize_instances, options['repeats']),
+                    measure_ms(serialize_values, options['repeats']),
+                    measure_ms(lambda: JSONRenderer().render(data), options['repeats']),
+                    measure_ms(lambda: FastJSONRenderer().render(data), options['repeats']),
+                ]
+
+                rows.append([size] + [f"{ms * 1000 / size:.1f}" for ms in timings])
+
+        print_table(self.stdout, ["Pets", "Serializer µs/pet", "Values µs/pet", "JSONRenderer µs/pet",
+                                  "FastJSONRenderer µs/pet"], rows)
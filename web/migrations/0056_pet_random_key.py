@@ -0,0 +1,31 @@
+# Generated by Django 3.1.14 on 2026-10-18 09:12
+
+import random
+
+from django.db import migrations, models
+
+
+def randomize_random_keys(apps, schema_editor):
+    Pet = apps.get_model('web', 'Pet')
+
+    pets = [Pet(pk=pk, random_key=random.random()) for pk in Pet.objects.values_list('pk', flat=True)]
+    Pet.objects.bulk_update(pets, ['random_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('web', '0055_auto_20200716_1424'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='random_key',
+            field=models.FloatField(default=random.random, editable=False),
+        ),
+        migrations.RunPython(randomize_random_keys, migrations.RunPython.noop),
+        migrations.AlterIndexTogether(
+            name='pet',
+            index_together={('order', 'id'), ('status', 'random_key')},
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.1.14 on 2026-10-18 11:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('web', '0056_pet_random_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetSimilarity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Panašumas')),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+',
+                                          to='web.pet', verbose_name='Gyvūnas')),
+                ('similar_pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+',
+                                                  to='web.pet', verbose_name='Panašus gyvūnas')),
+            ],
+            options={
+                'verbose_name': 'Gyvūnų panašumas',
+                'verbose_name_plural': 'Gyvūnų panašumai',
+                'unique_together': {('pet', 'similar_pet')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('web', '0057_petsimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='country',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now,
+                                       verbose_name='Atnaujinimo data'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now,
+                                       verbose_name='Atnaujinimo data'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('web', '0058_country_region_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pet_id', models.IntegerField(verbose_name='Gyvūnas')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Sukūrimo data')),
+            ],
+            options={
+                'verbose_name': 'Gyvūno pakeitimas',
+                'verbose_name_plural': 'Gyvūnų pakeitimai',
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 3.1.14 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+# Frozen copy of description builders at the time of this migration, later changes of models must not change it
+_GENDER_LABELS = {1: 'Patinas', 2: 'Patelė'}
+_SIZE_LABELS = {1: 'Mažas', 2: 'Vidutinis', 3: 'Didelis'}
+_DESEXED_TEXTS = {(1, True): 'kastruotas', (1, False): 'nekastruotas', (2, True): 'sterilizuota',
+                  (2, False): 'nesterilizuota'}
+
+
+def _properties_part(properties):
+    return f"Pastabos: {', '.join(properties).lower()}"
+
+
+def _special_information_part(special_information):
+    return f"Specialūs sveikatos poreikiai ir būklės:\n{special_information}"
+
+
+def _dog_description(pet, properties):
+    description_parts = [pet.description + "\n"]
+
+    if pet.gender:
+        gender_part = f"Lytis: {_GENDER_LABELS[pet.gender].lower()}"
+
+        if desexed_text := _DESEXED_TEXTS.get((pet.gender, pet.desexed)):
+            gender_part += f" ({desexed_text})"
+
+        description_parts.append(gender_part)
+
+    if pet.age:
+        description_parts.append(f"Amžius: apie {pet.age} m.")
+
+    if pet.size:
+        size_part = f"Dydis: {_SIZE_LABELS[pet.size].lower()}"
+        if pet.weight:
+            size_part += f" (apie {pet.weight} kg)"
+
+        description_parts.append(size_part)
+
+    if properties:
+        description_parts.append(_properties_part(properties))
+
+    if pet.special_information:
+        description_parts.append(_special_information_part(pet.special_information))
+
+    return '\n'.join(description_parts).strip(' \n\t')
+
+
+def _cat_description(pet, properties):
+    description_parts = [pet.description + "\n"]
+
+    gender_part = f"Lytis: {_GENDER_LABELS.get(pet.gender, 'Nepatikslinta').lower()}"
+    gender_part += f" ({_DESEXED_TEXTS.get((pet.gender, pet.desexed))})"
+
+    description_parts.append(gender_part)
+
+    if pet.age:
+        description_parts.append(f"Amžius: apie {pet.age} m.")
+
+    if pet.weight:
+        description_parts.append(f"Svoris: apie {pet.weight} kg")
+
+    if properties:
+        description_parts.append(_properties_part(properties))
+
+    if pet.special_information:
+        description_parts.append(_special_information_part(pet.special_information))
+
+    return '\n'.join(description_parts).strip(' \n\t')
+
+
+def fill_full_descriptions(apps, schema_editor):
+    Pet = apps.get_model('web', 'Pet')
+
+    for model_name, build_description in (('Dog', _dog_description), ('Cat', _cat_description)):
+        model = apps.get_model('web', model_name)
+
+        pets = []
+        for pet in model.objects.prefetch_related('properties'):
+            full_description = build_description(pet, sorted(p.name for p in pet.properties.all()))
+            pets.append(Pet(pk=pet.pk, full_description=full_description))
+
+        Pet.objects.bulk_update(pets, ['full_description'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('web', '0059_petchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='full_description',
+            field=models.TextField(default='', editable=False, verbose_name='Pilnas aprašymas'),
+        ),
+        migrations.RunPython(fill_full_descriptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 3.1.14 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('web', '0060_pet_full_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userpetchoice',
+            index=models.Index(fields=['user', 'is_favorite', '-id'], name='web_userpetchoice_favorites'),
+        ),
+    ]
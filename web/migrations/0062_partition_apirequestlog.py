@@ -0,0 +1,73 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:20
+
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+# This migration is irreversible: partitioned table can't be turned back into a plain table without copying all logs,
+# so migrating web below 0062 fails with IrreversibleError.
+
+# Names are frozen at the time of this migration and nothing is imported from the project, later changes of
+# web.request_logs or utils must not change it
+_TABLE = 'rest_framework_tracking_apirequestlog'
+_LEGACY_PARTITION = f'{_TABLE}_legacy'
+_DEFAULT_PARTITION = f'{_TABLE}_default'
+_DAILY_PARTITIONS_COUNT = 7
+
+
+def partition_api_request_log(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    quote_name = schema_editor.quote_name
+    table, legacy = quote_name(_TABLE), quote_name(_LEGACY_PARTITION)
+
+    first_day = timezone.now().date() + timedelta(days=1)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [_TABLE])
+        sequence, = cursor.fetchone()
+
+    # Existing logs are kept as a partition of days before the first daily partition and are dropped as a whole
+    schema_editor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    schema_editor.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {quote_name(_TABLE + '_pkey')} "
+                          f"TO {quote_name(_LEGACY_PARTITION + '_pkey')}")
+
+    # Primary key of partitioned table has to include partition key
+    schema_editor.execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS, "
+        f"PRIMARY KEY (id, requested_at)) PARTITION BY RANGE (requested_at)"
+    )
+    schema_editor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    schema_editor.execute(
+        f"ALTER TABLE {table} ADD FOREIGN KEY (user_id) REFERENCES {quote_name('web_user')} (id) "
+        f"DEFERRABLE INITIALLY DEFERRED"
+    )
+    for column in ('requested_at', 'user_id', 'path', 'view', 'view_method', 'status_code'):
+        schema_editor.execute(f"CREATE INDEX ON {table} ({quote_name(column)})")
+
+    # Attaching doesn't scan legacy logs again when a validated check constraint already proves they are in bounds
+    bound = quote_name(_LEGACY_PARTITION + '_bound')
+    schema_editor.execute(f"ALTER TABLE {legacy} ADD CONSTRAINT {bound} CHECK (requested_at < %s) NOT VALID",
+                          [str(first_day)])
+    schema_editor.execute(f"ALTER TABLE {legacy} VALIDATE CONSTRAINT {bound}")
+    schema_editor.execute(f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO (%s)",
+                          [str(first_day)])
+    schema_editor.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {bound}")
+
+    for day in (first_day + timedelta(days=i) for i in range(_DAILY_PARTITIONS_COUNT)):
+        schema_editor.execute(f"CREATE TABLE {quote_name(f'{_TABLE}_{day:%Y%m%d}')} PARTITION OF {table} "
+                              f"FOR VALUES FROM (%s) TO (%s)", [str(day), str(day + timedelta(days=1))])
+    schema_editor.execute(f"CREATE TABLE {quote_name(_DEFAULT_PARTITION)} PARTITION OF {table} DEFAULT")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('rest_framework_tracking', '0011_auto_20201117_2016'),
+        ('web', '0061_userpetchoice_favorites_index'),
+    ]
+
+    operations = [
+        # Irreversible, no reverse_code on purpose, see the module comment
+        migrations.RunPython(partition_api_request_log),
+    ]
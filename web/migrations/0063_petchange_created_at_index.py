@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('web', '0062_partition_apirequestlog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='petchange',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Sukūrimo data'),
+        ),
+    ]
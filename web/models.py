@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 import json
+import random
 import uuid
 from _md5 import md5
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
 from enum import Enum
+from math import cos, radians
 from os.path import join
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.contrib.gis.db.models import PointField
-from django.db import models
+from django.contrib.gis.db.models.functions import GeometryDistance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db import connection, models
 from django.db.models import Count, QuerySet
 from django.db.models.fields.files import ImageFieldFile
 from django.http import HttpRequest, HttpResponse
@@ -26,6 +32,32 @@ from utils.utils import django_now, file_extension, full_path, try_parse_int
 
 _SHELTER_GROUP_NAME = "Shelter"
 
+GENERATE_PETS_DECK_SIZE = 100
+GENERATE_PETS_NEAREST_SHELTERS_COUNT = 10
+GENERATE_PETS_RECOMMENDATION_CANDIDATES_COUNT = 500
+RANDOM_SAMPLE_PIVOTS_COUNT = 4
+
+FULL_DESCRIPTION_FIELDS = ('description', 'gender', 'desexed', 'age', 'weight', 'size', 'special_information')
+
+# Fields read by PetCatalog, it is reloaded only when they change
+PET_CATALOG_FIELDS = ('status', 'shelter', 'age', 'gender', 'size')
+SHELTER_CATALOG_FIELDS = ('is_published', 'region')
+
+_KM_IN_DEGREE = 111.32
+
+
+def _catalog_values(instance: models.Model, fields: Iterable[str]) -> list:
+    return [getattr(instance, field.attname) for field in instance._meta.concrete_fields if field.name in fields]
+
+
+def _updates_catalog_fields(updated_fields: Iterable[str], fields: Iterable[str]) -> bool:
+    return any((field[:-3] if field.endswith('_id') else field) in fields for field in updated_fields)
+
+
+def _invalidate_pet_catalog() -> None:
+    from web.catalog import PetCatalog
+    PetCatalog.invalidate()
+
 
 class UserQuerySet(models.QuerySet):
     def annotate_with_app_statistics(self) -> QuerySet[User]:
@@ -124,6 +156,8 @@ class Country(models.Model):
     code = models.CharField(verbose_name=_("Šalies kodas"), max_length=2, unique=True,
                             help_text=_("Šalies kodas pagal ISO 3166 alpha 2 standartą pvz: lt, lv"))
 
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Atnaujinimo data"))
+
     objects = CountryQuerySet.as_manager()
 
     class Meta:
@@ -148,6 +182,8 @@ class Region(models.Model):
                             help_text=_("Unikalus regiono kodas pvz: ankara"))
     country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name="regions", verbose_name=_("Šalis"))
 
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Atnaujinimo data"))
+
     class Meta:
         verbose_name = _("Regionas")
         verbose_name_plural = _("Regionai")
@@ -163,6 +199,28 @@ class Region(models.Model):
 
 
 class ShelterQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # Pets embed their shelter, they are read before the update might change which shelters are matched
+        pet_ids = list(self._pet_ids()) if PetChange.is_logged_update(kwargs) else []
+        rows = super().update(**kwargs)
+        PetChange.log(pet_ids)
+
+        if _updates_catalog_fields(kwargs, SHELTER_CATALOG_FIELDS):
+            _invalidate_pet_catalog()
+
+        return rows
+
+    def delete(self):
+        pet_ids = list(self._pet_ids())
+        result = super().delete()
+        PetChange.log(pet_ids)
+        _invalidate_pet_catalog()
+
+        return result
+
+    def _pet_ids(self) -> QuerySet[int]:
+        return Pet.objects.filter(shelter__in=self.order_by().values('pk')).values_list('pk', flat=True)
+
     # https://stackoverflow.com/questions/56567841/django-count-and-sum-annotations-interfere-with-each-other
     def annotate_with_statistics(self) -> QuerySet[Shelter]:
         pets_updated_at_max = Shelter.objects.annotate(
@@ -214,6 +272,19 @@ class ShelterQuerySet(models.QuerySet):
             ),
         )
 
+    def filter_within_distance(self, point: Point, distance_km: float) -> QuerySet[Shelter]:
+        # DWithin in degrees is served by location GiST index, exact distance is calculated only for matched shelters
+        distance_degrees = distance_km / (_KM_IN_DEGREE * max(cos(radians(point.y)), 0.01))
+
+        return self.filter(
+            location__dwithin=(point, distance_degrees),
+            location__distance_lte=(point, D(km=distance_km)),
+        )
+
+    def order_by_distance(self, point: Point) -> QuerySet[Shelter]:
+        # <-> operator makes KNN search using location GiST index
+        return self.order_by(GeometryDistance('location', point))
+
 
 class SheltersManager(models.Manager):
     def get_queryset(self) -> ShelterQuerySet:
@@ -276,9 +347,27 @@ class Shelter(models.Model):
 
     def save(self, force_insert=False, force_update=False, using=None,
              update_fields=None):
+        orig = Shelter.objects.filter(pk=self.pk).first() if self.pk is not None else None
+
         self.slug = slugify(self.name)
         super().save(force_insert, force_update, using, update_fields)
 
+        if PetChange.is_logged_update(update_fields):
+            PetChange.log(self.pets.values_list('pk', flat=True))
+
+        catalog_values = _catalog_values(self, SHELTER_CATALOG_FIELDS)
+        if orig is None or _catalog_values(orig, SHELTER_CATALOG_FIELDS) != catalog_values:
+            _invalidate_pet_catalog()
+
+    def delete(self, using=None, keep_parents=False):
+        pet_ids = list(self.pets.values_list('pk', flat=True))
+        result = super().delete(using, keep_parents)
+
+        PetChange.log(pet_ids)
+        _invalidate_pet_catalog()
+
+        return result
+
     @staticmethod
     def user_associated_shelters(user: AbstractBaseUser) -> QuerySet[Shelter]:
         if user.is_authenticated:
@@ -379,6 +468,25 @@ class PetSize(models.IntegerChoices):
 
 
 class PetQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # Pets are read before the update might change which pets are matched
+        pet_ids = list(self.values_list('pk', flat=True)) if PetChange.is_logged_update(kwargs) else []
+        rows = super().update(**kwargs)
+        PetChange.log(pet_ids)
+
+        if _updates_catalog_fields(kwargs, PET_CATALOG_FIELDS):
+            _invalidate_pet_catalog()
+
+        return rows
+
+    def delete(self):
+        pet_ids = list(self.values_list('pk', flat=True))
+        result = super().delete()
+        PetChange.log(pet_ids)
+        _invalidate_pet_catalog()
+
+        return result
+
     def select_related_full_shelter(self) -> PetQuerySet:
         return self.select_related('shelter', 'shelter__region', 'shelter__region__country')
 
@@ -437,6 +545,31 @@ class PetQuerySet(models.QuerySet):
     def filter_by_search_term(self, search_term: str):
         return self.filter(name__icontains=search_term)
 
+    def exclude_chosen_by_user(self, user: AbstractBaseUser) -> PetQuerySet:
+        # Anti-join uses UserPetChoice (user, pet) unique index, so cost doesn't depend on request size
+        return self.filter(~models.Exists(UserPetChoice.objects.filter(user=user, pet=models.OuterRef('pk'))))
+
+    def random_sample(self, size: int, pivots: int = RANDOM_SAMPLE_PIVOTS_COUNT) -> List[Pet]:
+        """Random pets for nearby and recommended generate modes, other decks are sampled from PetCatalog.
+
+        Seeks short runs from several random pivots in (status, random_key) index instead of sorting whole queryset
+        with RANDOM(), so decks of nearby pivots overlap less than a single run of size pets would.
+        """
+        run_size = -(-size // pivots)
+        ids = self.prefetch_related(None).values_list('pk', flat=True)
+
+        runs = [ids.filter(random_key__gte=random.random()).order_by('random_key')[:run_size] for _ in range(pivots)]
+        pet_ids = list(dict.fromkeys(runs[0].union(*runs[1:], all=True)))[:size]
+
+        # Runs near the end of key range wrap around to its beginning
+        if len(pet_ids) < size:
+            pet_ids += ids.exclude(id__any=pet_ids).order_by('random_key')[:size - len(pet_ids)]
+
+        pets = list(self.in_bulk(pet_ids).values())
+        random.shuffle(pets)
+
+        return pets
+
 
 class AvailablePetsManager(models.Manager):
     def get_queryset(self):
@@ -454,6 +587,7 @@ class Pet(models.Model):
     name = models.CharField(max_length=50, verbose_name=_("Gyvūno vardas"))
     slug = models.SlugField(editable=False)
     order = models.IntegerField(default=0, editable=False)
+    random_key = models.FloatField(default=random.random, editable=False)
 
     status = models.SmallIntegerField(
         choices=PetStatus.choices,
@@ -509,6 +643,7 @@ class Pet(models.Model):
             (False, _("Ne")),
         ),
     )
+    full_description = models.TextField(default='', editable=False, verbose_name=_("Pilnas aprašymas"))
 
     taken_at = models.DateTimeField(blank=True, null=True, editable=False, verbose_name=_('Paėmimo data'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Sukūrimo data'))
@@ -523,6 +658,7 @@ class Pet(models.Model):
         ordering = ("order", "id")
         index_together = [
             ("order", "id"),
+            ("status", "random_key"),
         ]
 
     def __str__(self):
@@ -532,7 +668,7 @@ class Pet(models.Model):
              update_fields=None):
         orig: Optional[Pet] = None
         if self.pk is not None:
-            orig = Pet.objects.get(pk=self.pk)
+            orig = type(self).objects.get(pk=self.pk)
 
             if orig.status != self.status:
                 if orig.status == PetStatus.AVAILABLE:
@@ -543,6 +679,13 @@ class Pet(models.Model):
         self.slug = slugify(self.name)
         self.short_description = self.short_description.rstrip('.')
 
+        # Only dogs and cats know their size and properties, stored description is read as is by pet lists
+        if type(self) is not Pet and (update_fields is None or set(update_fields) & set(FULL_DESCRIPTION_FIELDS)):
+            self.full_description = self.description_including_all_information()
+
+            if update_fields is not None:
+                update_fields = {*update_fields, 'full_description'}
+
         super().save(force_insert, force_update, using, update_fields)
 
         from web.tasks import on_pet_created_or_updated
@@ -552,6 +695,24 @@ class Pet(models.Model):
 
         on_pet_created_or_updated.delay(self.pk, orig_status, orig_status_text)
 
+        if PetChange.is_logged_update(update_fields):
+            PetChange.log([self.pk])
+
+        if orig is None or _catalog_values(orig, PET_CATALOG_FIELDS) != _catalog_values(self, PET_CATALOG_FIELDS):
+            _invalidate_pet_catalog()
+
+    def delete(self, using=None, keep_parents=False):
+        pet_id, status = self.pk, self.status
+        result = super().delete(using, keep_parents)
+
+        PetChange.log([pet_id])
+
+        # Only available pets are in catalog
+        if status == PetStatus.AVAILABLE:
+            _invalidate_pet_catalog()
+
+        return result
+
     def get_absolute_url(self) -> str:
         if hasattr(self, 'dog'):
             return self.dog.get_absolute_url()
@@ -564,19 +725,24 @@ class Pet(models.Model):
         return self.gender == PetGender.Male
 
     def desexed_status_text(self) -> Optional[str]:
-        if self.gender == PetGender.Male and self.desexed is True:
+        return Pet.build_desexed_status_text(self.gender, self.desexed)
+
+    @staticmethod
+    def build_desexed_status_text(gender: Optional[int], desexed: Optional[bool]) -> Optional[str]:
+        if gender == PetGender.Male and desexed is True:
             return _("kastruotas")
-        elif self.gender == PetGender.Male and self.desexed is False:
+        elif gender == PetGender.Male and desexed is False:
             return _("nekastruotas")
-        elif self.gender == PetGender.Female and self.desexed is True:
+        elif gender == PetGender.Female and desexed is True:
             return _("sterilizuota")
-        elif self.gender == PetGender.Female and self.desexed is False:
+        elif gender == PetGender.Female and desexed is False:
             return _("nesterilizuota")
 
         return None
 
     def properties_list(self) -> List[str]:
-        if hasattr(self, 'properties'):
+        # Properties are set after new pet is saved
+        if self.pk is not None and hasattr(self, 'properties'):
             return [p.name for p in self.properties.all()]
 
         return []
@@ -584,6 +750,23 @@ class Pet(models.Model):
     def description_including_all_information(self) -> str:
         return ""
 
+    @classmethod
+    def refresh_full_descriptions(cls, pet_ids: Iterable[int]) -> None:
+        """Stores descriptions of dogs or cats again after their properties change without saving pets."""
+        pets = cls.objects.filter(pk__in=list(pet_ids)).prefetch_related('properties').order_by()
+        updated_at = django_now()
+
+        changed_pets = []
+        for pet in pets:
+            full_description = pet.description_including_all_information()
+
+            if full_description != pet.full_description:
+                changed_pets.append(Pet(pk=pet.pk, full_description=full_description, updated_at=updated_at))
+
+        if changed_pets:
+            # Bulk update goes through PetQuerySet.update, which logs the changes
+            Pet.objects.bulk_update(changed_pets, ['full_description', 'updated_at'])
+
     def all_photos(self) -> List[ImageFieldFile]:
         photos = [self.photo]
 
@@ -654,50 +837,164 @@ class Dog(Pet):
         return reverse('management:dogs_update', kwargs={'pk': self.pk})
 
     def description_including_all_information(self) -> str:
-        description_parts = [self.description + "\n"]
+        return Dog.build_description_including_all_information(
+            description=self.description,
+            gender=self.gender,
+            desexed=self.desexed,
+            age=self.age,
+            weight=self.weight,
+            special_information=self.special_information,
+            properties=self.properties_list(),
+            size=self.size,
+        )
 
-        if self.gender:
-            gender_part = f"{_('Lytis')}: {self.get_gender_display().lower()}"
+    @staticmethod
+    def build_description_including_all_information(description: str, gender: Optional[int],
+                                                    desexed: Optional[bool], age: Optional[int],
+                                                    weight: Optional[int], special_information: Optional[str],
+                                                    properties: List[str], size: Optional[int] = None) -> str:
+        description_parts = [description + "\n"]
+
+        if gender:
+            gender_part = f"{_('Lytis')}: {PetGender(gender).label.lower()}"
 
-            if desexed_text := self.desexed_status_text():
+            if desexed_text := Pet.build_desexed_status_text(gender, desexed):
                 gender_part += f" ({desexed_text})"
 
             description_parts.append(gender_part)
 
-        if self.age:
-            age_part = f"{_('Amžius')}: {_('apie')} {self.age} m."
+        if age:
+            age_part = f"{_('Amžius')}: {_('apie')} {age} m."
             description_parts.append(age_part)
 
-        if self.size:
-            size_part = f"{_('Dydis')}: {self.get_size_display().lower()}"
-            if self.weight:
-                size_part += f" ({_('apie')} {self.weight} kg)"
+        if size:
+            size_part = f"{_('Dydis')}: {PetSize(size).label.lower()}"
+            if weight:
+                size_part += f" ({_('apie')} {weight} kg)"
 
             description_parts.append(size_part)
 
-        properties = self.properties_list()
         if len(properties) > 0:
             properties_part = f"{_('Pastabos')}: {', '.join(properties).lower()}"
             description_parts.append(properties_part)
 
-        if special_information := self.special_information:
+        if special_information:
             special_information_part = f"{_('Specialūs sveikatos poreikiai ir būklės')}:\n{special_information}"
             description_parts.append(special_information_part)
 
         return '\n'.join(description_parts).strip(' \n\t')
 
     @staticmethod
-    def generate_pets(liked_pet_ids: List[int], disliked_pet_ids: List[int], region: Optional[str],
-                      pet_type: PetType):
-        queryset = (Cat if pet_type == PetType.CAT else Dog)
-        queryset = queryset.available.prefetch_related('profile_photos', 'properties') \
-            .select_related_full_shelter() \
-            .exclude(pk__in=liked_pet_ids).order_by()
+    def generate_pets(liked_pet_ids: List[int], disliked_pet_ids: List[int], region: Optional[Region],
+                      pet_type: PetType, size: int = GENERATE_PETS_DECK_SIZE,
+                      user: Optional[AbstractBaseUser] = None, seen_pet_ids: Iterable[int] = (),
+                      location: Optional[Point] = None, max_distance_km: Optional[float] = None,
+                      recommended: bool = False, age_min: Optional[int] = None, age_max: Optional[int] = None,
+                      pet_size: Optional[PetSize] = None, gender: Optional[PetGender] = None,
+                      load_relations: bool = True) -> List[Pet]:
+        """Without load_relations pets are loaded without their shelter and profile photos."""
+        queryset = (Cat if pet_type == PetType.CAT else Dog).available.order_by()
+        if load_relations:
+            queryset = queryset.prefetch_related('profile_photos').select_related_full_shelter()
 
         if region:
             queryset = queryset.filter(shelter__region=region)
 
-        new_pets = queryset.exclude(pk__in=disliked_pet_ids).order_by('?')
+        if age_min is not None:
+            queryset = queryset.filter(age__gte=age_min)
+
+        if age_max is not None:
+            queryset = queryset.filter(age__lte=age_max)
+
+        if pet_size is not None:
+            queryset = queryset.filter(size=pet_size) if pet_type == PetType.DOG else queryset.none()
+
+        if gender is not None:
+            queryset = queryset.filter(gender=gender)
+
+        if user is not None and user.is_authenticated:
+            queryset = queryset.exclude_chosen_by_user(user)
+
+        excluded_pet_ids = set(liked_pet_ids).union(disliked_pet_ids, seen_pet_ids)
+        if excluded_pet_ids:
+            # Single array parameter instead of IN clause with thousands of parameters
+            queryset = queryset.exclude(id__any=excluded_pet_ids)
+
+        if location is not None:
+            return Dog._generate_nearby_pets(queryset, location, max_distance_km, size)
+
+        if recommended:
+            return Dog._generate_recommended_pets(queryset, liked_pet_ids, user, size)
+
+        from web.catalog import PetCatalog
+        from web.seen_pets import SeenPetsFilter
+
+        # Approximate, queryset below checks only sampled pets against user choices instead of loading all of them
+        seen_pets_filter = SeenPetsFilter.for_user(user.pk) if user is not None and user.is_authenticated else None
+
+        pet_ids = PetCatalog.current().sample(
+            pet_type=pet_type,
+            size=size,
+            region_id=region.pk if region else None,
+            excluded_pet_ids=excluded_pet_ids,
+            excluded_pets_filter=seen_pets_filter,
+            age_min=age_min,
+            age_max=age_max,
+            pet_size=pet_size,
+            gender=gender,
+        )
+
+        # Catalog might be older than database, queryset filters out pets which are no longer available
+        pets = queryset.in_bulk(pet_ids)
+
+        return [pets[pet_id] for pet_id in pet_ids if pet_id in pets]
+
+    @staticmethod
+    def _generate_recommended_pets(queryset: PetQuerySet, liked_pet_ids: List[int],
+                                   user: Optional[AbstractBaseUser], size: int) -> List[Pet]:
+        liked_filter = models.Q(pet__in=liked_pet_ids)
+        if user is not None and user.is_authenticated:
+            liked_filter |= models.Q(pet__in=UserPetChoice.objects.filter(user=user, is_favorite=True).values('pet'))
+
+        scores = dict(
+            PetSimilarity.objects.filter(liked_filter)
+                .values('similar_pet')
+                .annotate(total_score=models.Sum('score'))
+                .order_by('-total_score')
+                .values_list('similar_pet', 'total_score')[:GENERATE_PETS_RECOMMENDATION_CANDIDATES_COUNT]
+        )
+        if not scores:
+            return queryset.random_sample(size)
+
+        # Candidates are ranked by ids, only pets of the deck are loaded with their relations
+        candidate_ids = queryset.filter(id__any=scores.keys()).prefetch_related(None).values_list('pk', flat=True)
+        pet_ids = sorted(candidate_ids, key=lambda pet_id: -scores[pet_id])[:size]
+
+        pets = queryset.in_bulk(pet_ids)
+        new_pets = [pets[pet_id] for pet_id in pet_ids if pet_id in pets]
+
+        if len(new_pets) < size:
+            new_pets += queryset.exclude(id__any=scores.keys()).random_sample(size - len(new_pets))
+
+        return new_pets
+
+    @staticmethod
+    def _generate_nearby_pets(queryset: PetQuerySet, location: Point, max_distance_km: Optional[float],
+                              size: int) -> List[Pet]:
+        shelters = Shelter.available.all().order_by_distance(location)
+        if max_distance_km is not None:
+            shelters = shelters.filter_within_distance(location, max_distance_km)
+        else:
+            shelters = shelters[:GENERATE_PETS_NEAREST_SHELTERS_COUNT]
+
+        shelter_ids = list(shelters.values_list('pk', flat=True))
+        shelter_rank = {shelter_id: rank for rank, shelter_id in enumerate(shelter_ids)}
+
+        new_pets = queryset.filter(shelter__in=shelter_ids).random_sample(size)
+        new_pets.sort(key=lambda pet: shelter_rank[pet.shelter_id])
+
+        if max_distance_km is None and len(new_pets) < size:
+            new_pets += queryset.exclude(shelter__in=shelter_ids).random_sample(size - len(new_pets))
 
         return new_pets
 
@@ -721,6 +1018,19 @@ class DogProperty(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        super().save(force_insert, force_update, using, update_fields)
+
+        Dog.refresh_full_descriptions(self.dogs.values_list('pk', flat=True))
+
+    def delete(self, using=None, keep_parents=False):
+        dog_ids = list(self.dogs.values_list('pk', flat=True))
+        result = super().delete(using, keep_parents)
+
+        Dog.refresh_full_descriptions(dog_ids)
+
+        return result
+
 
 class Cat(Pet):
     properties = models.ManyToManyField("web.CatProperty", blank=True, related_name="+",
@@ -764,28 +1074,42 @@ class Cat(Pet):
         return images
 
     def description_including_all_information(self) -> str:
-        description_parts = [self.description + "\n"]
+        return Cat.build_description_including_all_information(
+            description=self.description,
+            gender=self.gender,
+            desexed=self.desexed,
+            age=self.age,
+            weight=self.weight,
+            special_information=self.special_information,
+            properties=self.properties_list(),
+        )
+
+    @staticmethod
+    def build_description_including_all_information(description: str, gender: Optional[int],
+                                                    desexed: Optional[bool], age: Optional[int],
+                                                    weight: Optional[int], special_information: Optional[str],
+                                                    properties: List[str], size: Optional[int] = None) -> str:
+        description_parts = [description + "\n"]
 
-        gender_part = f"{_('Lytis')}: {self.get_gender_display().lower()}"
-        gender_part += f" ({self.desexed_status_text()})"
+        gender_part = f"{_('Lytis')}: {PetGender(gender).label.lower()}"
+        gender_part += f" ({Pet.build_desexed_status_text(gender, desexed)})"
 
         description_parts.append(gender_part)
 
-        if self.age:
-            age_part = f"{_('Amžius')}: {_('apie')} {self.age} m."
+        if age:
+            age_part = f"{_('Amžius')}: {_('apie')} {age} m."
             description_parts.append(age_part)
 
-        if self.weight:
-            size_part = f"Svoris: apie {self.weight} kg"
+        if weight:
+            size_part = f"Svoris: apie {weight} kg"
 
             description_parts.append(size_part)
 
-        properties = self.properties_list()
         if len(properties) > 0:
             properties_part = f"{_('Pastabos')}: {', '.join(properties).lower()}"
             description_parts.append(properties_part)
 
-        if special_information := self.special_information:
+        if special_information:
             special_information_part = f"{_('Specialūs sveikatos poreikiai ir būklės')}:\n{special_information}"
             description_parts.append(special_information_part)
 
@@ -817,6 +1141,38 @@ class CatProperty(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        super().save(force_insert, force_update, using, update_fields)
+
+        Cat.refresh_full_descriptions(self.cats.values_list('pk', flat=True))
+
+    def delete(self, using=None, keep_parents=False):
+        cat_ids = list(self.cats.values_list('pk', flat=True))
+        result = super().delete(using, keep_parents)
+
+        Cat.refresh_full_descriptions(cat_ids)
+
+        return result
+
+
+def _refresh_full_descriptions_on_properties_change(sender, instance, action, model, pk_set, **kwargs):
+    # Properties are changed from both pet and property side, instance is a pet only in the first case
+    if isinstance(instance, Pet):
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            type(instance).refresh_full_descriptions([instance.pk])
+        return
+
+    if action == 'pre_clear':
+        instance._cleared_pet_ids = list(model.objects.filter(properties=instance).values_list('pk', flat=True))
+    elif action == 'post_clear':
+        model.refresh_full_descriptions(instance._cleared_pet_ids)
+    elif action in ('post_add', 'post_remove'):
+        model.refresh_full_descriptions(pk_set)
+
+
+models.signals.m2m_changed.connect(_refresh_full_descriptions_on_properties_change, sender=Dog.properties.through)
+models.signals.m2m_changed.connect(_refresh_full_descriptions_on_properties_change, sender=Cat.properties.through)
+
 
 class PetProfilePhoto(models.Model):
     def _pet_photo_file(self, filename):
@@ -855,6 +1211,24 @@ class PetProfilePhoto(models.Model):
     def __str__(self):
         return self.photo.url
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        super().save(force_insert, force_update, using, update_fields)
+
+        self._touch_pet()
+
+    def delete(self, using=None, keep_parents=False):
+        result = super().delete(using, keep_parents)
+
+        self._touch_pet()
+
+        return result
+
+    def _touch_pet(self):
+        # Profile photos are part of the serialized pet, so pet update time has to change with them.
+        if self.pet_id is not None:
+            Pet.objects.filter(pk=self.pet_id).update(updated_at=django_now())
+
 
 class GetPetRequestStatus(models.IntegerChoices):
     USER_WANTS_PET = 1, _('Noras paimti gyvūną')
@@ -897,6 +1271,130 @@ class UserPetChoice(models.Model):
         unique_together = ('user', 'pet')
         default_related_name = "users_pet_choices"
         ordering = ['-id']
+        indexes = [
+            # User favorites are paged from the newest choice
+            models.Index(fields=['user', 'is_favorite', '-id'], name='web_userpetchoice_favorites'),
+        ]
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        super().save(force_insert, force_update, using, update_fields)
+
+        from web.seen_pets import SeenPetsFilter
+        SeenPetsFilter.add(self.user_id, self.pet_id)
+
+    @staticmethod
+    def upsert(user_id: int, choices: Dict[int, bool]) -> List[int]:
+        """Saves user choices by pet id, see upsert_many. Returns saved pet ids."""
+        return [pet_id for _, pet_id in UserPetChoice.upsert_many({
+            (user_id, pet_id): is_favorite for pet_id, is_favorite in choices.items()
+        })]
+
+    @staticmethod
+    def upsert_many(choices: Dict[Tuple[int, int], bool]) -> List[Tuple[int, int]]:
+        """Saves choices by user and pet id in one statement, choices of already chosen pets are updated, so
+        repeated calls leave the same state. Choices of users or pets which no longer exist are skipped.
+        Returns saved user and pet id pairs."""
+        if not choices:
+            return []
+
+        user_ids, pet_ids = zip(*choices.keys())
+        now = django_now()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {UserPetChoice._meta.db_table} (user_id, pet_id, is_favorite, created_at, updated_at)
+                SELECT choice.user_id, choice.pet_id, choice.is_favorite, %s, %s
+                FROM unnest(%s::integer[], %s::integer[], %s::boolean[]) AS choice (user_id, pet_id, is_favorite)
+                WHERE EXISTS (SELECT 1 FROM {Pet._meta.db_table} pet WHERE pet.id = choice.pet_id)
+                    AND EXISTS (SELECT 1 FROM {User._meta.db_table} u WHERE u.id = choice.user_id)
+                ON CONFLICT (user_id, pet_id) DO UPDATE
+                SET is_favorite = EXCLUDED.is_favorite, updated_at = EXCLUDED.updated_at
+                RETURNING user_id, pet_id
+            """, [now, now, list(user_ids), list(pet_ids), list(choices.values())])
+            saved = cursor.fetchall()
+
+        saved_pet_ids = defaultdict(list)
+        for user_id, pet_id in saved:
+            saved_pet_ids[user_id].append(pet_id)
+
+        from web.seen_pets import SeenPetsFilter
+        for user_id, user_pet_ids in saved_pet_ids.items():
+            SeenPetsFilter.add(user_id, *user_pet_ids)
+
+        return saved
+
+
+class PetSimilarity(models.Model):
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='+', verbose_name=_("Gyvūnas"))
+    similar_pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='+',
+                                    verbose_name=_("Panašus gyvūnas"))
+    score = models.FloatField(verbose_name=_("Panašumas"))
+
+    class Meta:
+        verbose_name = _("Gyvūnų panašumas")
+        verbose_name_plural = _("Gyvūnų panašumai")
+        unique_together = ('pet', 'similar_pet')
+
+
+class PetChange(models.Model):
+    # Not a foreign key, changes of deleted pets are kept as tombstones for synced clients
+    pet_id = models.IntegerField(verbose_name=_("Gyvūnas"))
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name=_('Sukūrimo data'))
+
+    # Changes are read in id order, a transaction committing later than others might have logged lower ids, so
+    # changes logged within the lag are not returned yet
+    SAFETY_LAG = timedelta(seconds=30)
+
+    class Meta:
+        verbose_name = _("Gyvūno pakeitimas")
+        verbose_name_plural = _("Gyvūnų pakeitimai")
+
+    @staticmethod
+    def safe_until() -> datetime:
+        return django_now() - PetChange.SAFETY_LAG
+
+    @staticmethod
+    def snapshot_cursor() -> int:
+        """Cursor to continue with after reading all pets, changes logged within the lag are returned again."""
+        changes = PetChange.objects.order_by('id').values_list('id', flat=True)
+
+        recent_change_id = changes.filter(created_at__gt=PetChange.safe_until()).first()
+        if recent_change_id is not None:
+            return recent_change_id - 1
+
+        return changes.last() or 0
+
+    @staticmethod
+    def is_expired_cursor(since: int) -> bool:
+        # Changes after the cursor might have been deleted by retention, ids are sequential apart from rollbacks
+        oldest_change_id = PetChange.objects.order_by('id').values_list('id', flat=True).first()
+
+        return oldest_change_id is not None and since < oldest_change_id - 1
+
+    @staticmethod
+    def delete_expired(retention_days: int) -> int:
+        # The latest change is kept, so clients with cursors before deleted changes are recognised
+        latest_change_id = PetChange.objects.order_by('id').values_list('id', flat=True).last()
+        if latest_change_id is None:
+            return 0
+
+        deleted, _ = PetChange.objects.filter(
+            created_at__lt=django_now() - timedelta(days=retention_days),
+            id__lt=latest_change_id,
+        ).delete()
+
+        return deleted
+
+    @staticmethod
+    def is_logged_update(update_fields: Optional[Iterable[str]]) -> bool:
+        # Order and random key are reshuffled periodically and are not part of pet data synced by clients
+        return update_fields is None or not set(update_fields) <= {'order', 'random_key'}
+
+    @staticmethod
+    def log(pet_ids: Iterable[int]) -> None:
+        PetChange.objects.bulk_create([PetChange(pet_id=pet_id) for pet_id in pet_ids])
 
 
 class Mentor(models.Model):
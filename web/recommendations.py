@@ -0,0 +1,46 @@
+from typing import Iterator, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+def co_like_similarities(user_ids: np.ndarray, pet_ids: np.ndarray,
+                         top_k: int) -> Iterator[Tuple[int, int, float]]:
+    """Calculates cosine similarity between pets liked by the same users.
+
+    :param user_ids: user id of each like
+    :param pet_ids: pet id of each like
+    :param top_k: number of most similar pets returned for each pet
+    :return: (pet id, similar pet id, score) tuples
+    """
+    if len(pet_ids) == 0:
+        return
+
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    pets, pet_index = np.unique(pet_ids, return_inverse=True)
+
+    likes = sparse.csr_matrix(
+        (np.ones(len(pet_index), dtype=np.float32), (user_index, pet_index)),
+        shape=(len(users), len(pets))
+    )
+    likes.data[:] = 1
+
+    co_likes = (likes.T @ likes).tocsr()
+    co_likes.setdiag(0)
+    co_likes.eliminate_zeros()
+
+    likes_count = np.asarray(likes.sum(axis=0)).ravel()
+    rows = np.repeat(np.arange(co_likes.shape[0]), np.diff(co_likes.indptr))
+    co_likes.data /= np.sqrt(likes_count[rows] * likes_count[co_likes.indices])
+
+    for row in range(co_likes.shape[0]):
+        start, end = co_likes.indptr[row], co_likes.indptr[row + 1]
+        scores = co_likes.data[start:end]
+        columns = co_likes.indices[start:end]
+
+        if len(scores) > top_k:
+            top = np.argpartition(-scores, top_k)[:top_k]
+            scores, columns = scores[top], columns[top]
+
+        for column, score in zip(columns, scores):
+            yield int(pets[row]), int(pets[column]), float(score)
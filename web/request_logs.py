@@ -0,0 +1,176 @@
+import json
+import re
+from datetime import date, timedelta
+from typing import List, Tuple
+
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+from rest_framework_tracking.models import APIRequestLog
+
+from utils.utils import django_now, redis_client
+
+
+def _redis() -> redis.Redis:
+    return redis_client(settings.API_LOGGING_BUFFER_REDIS_URL)
+
+
+class APIRequestLogBuffer:
+    """API request logs queued in a Redis list and saved to database in batches by flush_api_request_logs task,
+    so logged requests don't wait for a database write.
+
+    Logs are saved at most once, batch which fails to save is dropped. Queue is capped, the oldest logs are dropped
+    while logs are not flushed.
+    """
+    QUEUE_KEY = 'api-request-logs'
+    MAX_QUEUE_LENGTH = 100_000
+    FLUSH_BATCH_SIZE = 1000
+    FLUSH_MAX_BATCHES = 50
+    _TEXT_FIELDS = ('query_params', 'data', 'response', 'errors')
+
+    @classmethod
+    def record(cls, log: dict) -> str:
+        record = dict(log)
+
+        user = record.pop('user', None)
+        record['user_id'] = user.pk if user is not None else None
+        # DjangoJSONEncoder would truncate time to milliseconds
+        record['requested_at'] = record['requested_at'].isoformat()
+
+        # Same text as saving log model would store
+        for field in cls._TEXT_FIELDS:
+            if record.get(field) is not None:
+                record[field] = str(record[field])
+
+        return json.dumps(record, cls=DjangoJSONEncoder)
+
+    @staticmethod
+    def request_log(record: str) -> APIRequestLog:
+        fields = json.loads(record)
+        fields['requested_at'] = parse_datetime(fields['requested_at'])
+
+        return APIRequestLog(**fields)
+
+    @classmethod
+    def append(cls, log: dict) -> None:
+        with _redis().pipeline() as pipeline:
+            pipeline.rpush(cls.QUEUE_KEY, cls.record(log))
+            pipeline.ltrim(cls.QUEUE_KEY, -cls.MAX_QUEUE_LENGTH, -1)
+            pipeline.execute()
+
+    @classmethod
+    def flush(cls) -> int:
+        """Saves queued logs to database. Returns number of saved logs."""
+        flushed = 0
+
+        for _ in range(cls.FLUSH_MAX_BATCHES):
+            # Batch is taken atomically, concurrent flushes don't save the same logs
+            with _redis().pipeline() as pipeline:
+                pipeline.lrange(cls.QUEUE_KEY, 0, cls.FLUSH_BATCH_SIZE - 1)
+                pipeline.ltrim(cls.QUEUE_KEY, cls.FLUSH_BATCH_SIZE, -1)
+                records, _ = pipeline.execute()
+
+            if not records:
+                break
+
+            APIRequestLog.objects.bulk_create([cls.request_log(record) for record in records])
+            flushed += len(records)
+
+        return flushed
+
+
+class APIRequestLogPartitions:
+    """Daily partitions of API request log table, which is partitioned by request time on PostgreSQL.
+
+    Partitions are created weeks ahead and expired ones are dropped by maintain_api_request_log_partitions task,
+    so old logs are removed without deletes and vacuum. Logs of days without a partition go to the default partition,
+    they are moved to the partition of their day when it's created, or deleted from the default partition when expired.
+    """
+    TABLE = APIRequestLog._meta.db_table
+    DEFAULT_PARTITION = f"{TABLE}_default"
+    LEGACY_PARTITION = f"{TABLE}_legacy"
+    CREATE_DAYS_AHEAD = 30
+    _UPPER_BOUND_PATTERN = re.compile(r"TO \('(\d{4}-\d{2}-\d{2})")
+
+    @staticmethod
+    def is_supported() -> bool:
+        return connection.vendor == 'postgresql'
+
+    @classmethod
+    def partition_name(cls, day: date) -> str:
+        return f"{cls.TABLE}_{day:%Y%m%d}"
+
+    @classmethod
+    def _range_partitions(cls, cursor) -> List[Tuple[str, date]]:
+        """Names and upper bounds of partitions, except the default partition which has no bounds."""
+        cursor.execute(
+            "SELECT partition.relname, pg_get_expr(partition.relpartbound, partition.oid) "
+            "FROM pg_inherits JOIN pg_class partition ON partition.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [cls.TABLE],
+        )
+
+        partitions = []
+        for partition, bound in cursor.fetchall():
+            match = cls._UPPER_BOUND_PATTERN.search(bound)
+            if match:
+                partitions.append((partition, date.fromisoformat(match.group(1))))
+
+        return partitions
+
+    @classmethod
+    def create(cls, days_ahead: int = CREATE_DAYS_AHEAD) -> List[str]:
+        """Creates missing partitions of days from today, or from the last partition when it ends later, until
+        days_ahead days from today. Returns names of created partitions."""
+        today = django_now().date()
+        quote_name = connection.ops.quote_name
+        table, default_partition = quote_name(cls.TABLE), quote_name(cls.DEFAULT_PARTITION)
+        partitions = []
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Logs of days without a partition can't arrive to the default partition while they are moved out of it
+            cursor.execute(f"LOCK TABLE {default_partition} IN SHARE ROW EXCLUSIVE MODE")
+
+            # Logs of missed days before today stay in the default partition until they expire
+            from_day = max([today] + [upper_bound for _, upper_bound in cls._range_partitions(cursor)])
+            last_day = today + timedelta(days=days_ahead)
+
+            for day in (from_day + timedelta(days=i) for i in range((last_day - from_day).days + 1)):
+                partition = cls.partition_name(day)
+                name, constraint = quote_name(partition), quote_name(f"{partition}_bounds")
+                bounds = [str(day), str(day + timedelta(days=1))]
+
+                # Partition is filled before attaching, check constraint spares attaching a scan of its rows
+                cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {default_partition} WHERE requested_at >= %s AND requested_at < %s "
+                    f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+                    bounds,
+                )
+                cursor.execute(f"ALTER TABLE {name} ADD CONSTRAINT {constraint} "
+                               f"CHECK (requested_at >= %s AND requested_at < %s)", bounds)
+                cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", bounds)
+                cursor.execute(f"ALTER TABLE {name} DROP CONSTRAINT {constraint}")
+                partitions.append(partition)
+
+        return partitions
+
+    @classmethod
+    def drop_expired(cls, retention_days: int) -> List[str]:
+        """Drops partitions with logs older than retention_days only, such logs in the default partition are deleted.
+        Returns names of dropped partitions."""
+        cutoff = django_now().date() - timedelta(days=retention_days)
+        quote_name = connection.ops.quote_name
+        dropped = []
+
+        with connection.cursor() as cursor:
+            for partition, upper_bound in cls._range_partitions(cursor):
+                if upper_bound <= cutoff:
+                    cursor.execute(f"DROP TABLE {quote_name(partition)}")
+                    dropped.append(partition)
+
+            cursor.execute(f"DELETE FROM {quote_name(cls.DEFAULT_PARTITION)} WHERE requested_at < %s", [str(cutoff)])
+
+        return sorted(dropped)
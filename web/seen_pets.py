@@ -0,0 +1,59 @@
+import numpy as np
+from django.core.cache import cache
+
+from utils.bloom import BloomFilter
+from web.models import UserPetChoice
+
+
+class SeenPetsFilter:
+    """Bloom filter of pets chosen by user kept in cache, so generated pets exclude them without loading choices.
+
+    Filter is updated on every choice save and rebuilt from choices when it is missing, full or periodically.
+    """
+    CACHE_KEY_PREFIX = 'seen-pets-filter'
+    CACHE_TIMEOUT = 7 * 24 * 60 * 60
+    ERROR_RATE = 0.001
+    MIN_CAPACITY = 1024
+
+    @classmethod
+    def _cache_key(cls, user_id: int) -> str:
+        return f"{cls.CACHE_KEY_PREFIX}:{user_id}"
+
+    @classmethod
+    def for_user(cls, user_id: int) -> BloomFilter:
+        seen_pets = cache.get(cls._cache_key(user_id))
+
+        if seen_pets is None:
+            seen_pets = cls.rebuild(user_id)
+
+        return seen_pets
+
+    @classmethod
+    def rebuild(cls, user_id: int) -> BloomFilter:
+        pet_ids = np.fromiter(
+            UserPetChoice.objects.filter(user_id=user_id).order_by().values_list('pet_id', flat=True),
+            dtype=np.int64,
+        )
+
+        # Room for as many new choices as there are now, filter is rebuilt bigger once they are made
+        seen_pets = BloomFilter(capacity=max(cls.MIN_CAPACITY, 2 * len(pet_ids)), error_rate=cls.ERROR_RATE)
+        seen_pets.add(pet_ids)
+
+        cache.set(cls._cache_key(user_id), seen_pets, cls.CACHE_TIMEOUT)
+
+        return seen_pets
+
+    @classmethod
+    def add(cls, user_id: int, *pet_ids: int) -> None:
+        seen_pets = cache.get(cls._cache_key(user_id))
+
+        if seen_pets is None:
+            # Built from choices on first use
+            return
+
+        if seen_pets.count + len(pet_ids) > seen_pets.capacity:
+            cls.rebuild(user_id)
+            return
+
+        seen_pets.add(pet_ids)
+        cache.set(cls._cache_key(user_id), seen_pets, cls.CACHE_TIMEOUT)
@@ -1,14 +1,25 @@
 import logging
+import random
+from datetime import timedelta
+from itertools import chain
 from typing import Optional
 
+import numpy as np
 from celery import shared_task
 from django.contrib.auth import get_user_model
 from django.contrib.sitemaps import ping_google
 from django.core.mail import send_mail
+from django.db import transaction
 
 from getpet import settings
-from utils.utils import Datadog
-from web.models import Cat, Dog, GetPetRequest, Pet, PetStatus, Shelter, User, UserPetChoice
+from utils.utils import Datadog, django_now
+from web.choice_buffer import PetChoiceBuffer
+from web.decks import UserPetDeck
+from web.models import Cat, Dog, GetPetRequest, Pet, PetChange, PetSimilarity, PetStatus, PetType, Shelter, User, \
+    UserPetChoice
+from web.recommendations import co_like_similarities
+from web.request_logs import APIRequestLogBuffer, APIRequestLogPartitions
+from web.seen_pets import SeenPetsFilter
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +118,18 @@ def randomize_pets_order():
     return True
 
 
+@shared_task(soft_time_limit=5 * 60, autoretry_for=(Exception,), retry_backoff=True)
+def randomize_pets_random_keys(batch_size=1000):
+    # Runs of PetQuerySet.random_sample follow random_key order, weekly rekey evens out pets after large key gaps
+    pet_ids = list(Pet.objects.order_by().values_list('pk', flat=True))
+
+    for i in range(0, len(pet_ids), batch_size):
+        pets = [Pet(pk=pk, random_key=random.random()) for pk in pet_ids[i:i + batch_size]]
+        Pet.objects.bulk_update(pets, ['random_key'])
+
+    return len(pet_ids)
+
+
 @shared_task(soft_time_limit=60, autoretry_for=(Exception,), retry_backoff=True)
 def randomize_shelters_order():
     for i, shelter in enumerate(Shelter.objects.order_by('?'), start=1):
@@ -114,3 +137,73 @@ def randomize_shelters_order():
         shelter.save(update_fields=('order',))
 
     return True
+
+
+@shared_task(soft_time_limit=30 * 60, autoretry_for=(Exception,), retry_backoff=True)
+def compute_pet_similarities(top_k=50):
+    likes = UserPetChoice.objects.filter(is_favorite=True).order_by().values_list('user_id', 'pet_id')
+    likes = np.fromiter(chain.from_iterable(likes.iterator(chunk_size=10_000)), dtype=np.int64).reshape(-1, 2)
+
+    similarities = [
+        PetSimilarity(pet_id=pet_id, similar_pet_id=similar_pet_id, score=score)
+        for pet_id, similar_pet_id, score in co_like_similarities(likes[:, 0], likes[:, 1], top_k)
+    ]
+
+    with transaction.atomic():
+        PetSimilarity.objects.all().delete()
+        PetSimilarity.objects.bulk_create(similarities, batch_size=5000)
+
+    return len(similarities)
+
+
+@shared_task(soft_time_limit=60, autoretry_for=(Exception,), retry_backoff=True)
+def refill_user_pet_deck(user_pk: int, pet_type: str):
+    user = User.objects.get(pk=user_pk)
+
+    return UserPetDeck.refill(user, PetType(pet_type))
+
+
+@shared_task(soft_time_limit=30 * 60, autoretry_for=(Exception,), retry_backoff=True)
+def rebuild_seen_pets_filters(days=1):
+    # Concurrent choice saves can overwrite each other's filter updates, rebuild filters of recently active users
+    user_ids = UserPetChoice.objects.filter(updated_at__gte=django_now() - timedelta(days=days)) \
+        .order_by() \
+        .values_list('user_id', flat=True) \
+        .distinct()
+
+    rebuilt = 0
+    for user_id in user_ids.iterator():
+        SeenPetsFilter.rebuild(user_id)
+        rebuilt += 1
+
+    return rebuilt
+
+
+@shared_task(soft_time_limit=PetChoiceBuffer.FLUSH_LOCK_TIMEOUT)
+def flush_pet_choice_buffer():
+    # Runs every few seconds, failed flush is retried by the next run
+    return PetChoiceBuffer.flush()
+
+
+@shared_task(soft_time_limit=30 * 60, autoretry_for=(Exception,), retry_backoff=True)
+def delete_expired_pet_changes():
+    return PetChange.delete_expired(settings.PET_CHANGES_RETENTION_DAYS)
+
+
+@shared_task(soft_time_limit=60)
+def flush_api_request_logs():
+    return APIRequestLogBuffer.flush()
+
+
+@shared_task(soft_time_limit=5 * 60, autoretry_for=(Exception,), retry_backoff=True)
+def maintain_api_request_log_partitions():
+    if not APIRequestLogPartitions.is_supported():
+        return None
+
+    # Expired logs are dropped first, so retention keeps working while partitions can't be created
+    dropped = APIRequestLogPartitions.drop_expired(settings.API_REQUEST_LOG_RETENTION_DAYS)
+
+    return {
+        'created': APIRequestLogPartitions.create(),
+        'dropped': dropped,
+    }
@@ -0,0 +1,205 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import redis
+
+
+def _encode(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakeRedisLock:
+    def __init__(self, client: 'FakeRedis', name: str):
+        self.client = client
+        self.name = name
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if self.name in self.client.locks:
+            return False
+
+        self.client.locks.add(self.name)
+        return True
+
+    def release(self):
+        self.client.locks.discard(self.name)
+
+
+class FakeRedisPipeline:
+    def __init__(self, client: 'FakeRedis'):
+        self.client = client
+        self.commands = []
+        self.watching = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.commands = []
+
+    def watch(self, *keys):
+        # Commands run immediately until multi, no other client changes watched keys meanwhile
+        self.watching = True
+
+    def multi(self):
+        self.watching = False
+
+    def __getattr__(self, name):
+        if self.watching:
+            return getattr(self.client, name)
+
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+
+        return command
+
+    def execute(self) -> list:
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = []
+
+        return results
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands used by PetChoiceBuffer and UserPetDeck, tests don't need a Redis
+    server.
+
+    Streams support a single consumer group. Entries read by it stay pending until acknowledged and are read again
+    with id 0, the same as in Redis.
+    """
+
+    def __init__(self):
+        self.strings: Dict[bytes, bytes] = {}
+        self.hashes: Dict[bytes, Dict[bytes, bytes]] = defaultdict(dict)
+        self.lists: Dict[bytes, List[bytes]] = {}
+        self.streams: Dict[bytes, List[Tuple[bytes, Dict[bytes, bytes]]]] = defaultdict(list)
+        self.groups: Set[Tuple[bytes, str]] = set()
+        self.delivered: Set[bytes] = set()
+        self.pending: Set[bytes] = set()
+        self.locks: Set[str] = set()
+        self._last_id = 0
+
+    def pipeline(self) -> FakeRedisPipeline:
+        return FakeRedisPipeline(self)
+
+    def transaction(self, func, *watches, value_from_callable: bool = False):
+        with self.pipeline() as pipeline:
+            pipeline.watch(*watches)
+            value = func(pipeline)
+            results = pipeline.execute()
+
+        return value if value_from_callable else results
+
+    def lock(self, name: str, timeout: Optional[float] = None) -> FakeRedisLock:
+        return FakeRedisLock(self, name)
+
+    def exists(self, *keys) -> int:
+        return sum(1 for key in map(_encode, keys) if key in self.strings or key in self.lists or self.hashes.get(key))
+
+    def delete(self, *keys) -> int:
+        deleted = self.exists(*keys)
+        for key in map(_encode, keys):
+            self.strings.pop(key, None)
+            self.lists.pop(key, None)
+            self.hashes.pop(key, None)
+
+        return deleted
+
+    def set(self, key, value, nx: bool = False, ex: Optional[int] = None) -> Optional[bool]:
+        if nx and _encode(key) in self.strings:
+            return None
+
+        self.strings[_encode(key)] = _encode(value)
+        return True
+
+    def get(self, key) -> Optional[bytes]:
+        return self.strings.get(_encode(key))
+
+    @staticmethod
+    def _range(values: list, start: int, end: int) -> slice:
+        # Redis ranges include end, negative indexes count from the end
+        start, end = (index + len(values) if index < 0 else index for index in (start, end))
+        return slice(max(start, 0), max(end + 1, 0))
+
+    def rpush(self, key, *values) -> int:
+        values_list = self.lists.setdefault(_encode(key), [])
+        values_list.extend(map(_encode, values))
+
+        return len(values_list)
+
+    def lrange(self, key, start: int, end: int) -> List[bytes]:
+        values = self.lists.get(_encode(key), [])
+        return values[self._range(values, start, end)]
+
+    def ltrim(self, key, start: int, end: int) -> bool:
+        values = self.lists.get(_encode(key), [])
+        self.lists[_encode(key)] = values[self._range(values, start, end)]
+        if not self.lists[_encode(key)]:
+            del self.lists[_encode(key)]
+
+        return True
+
+    def llen(self, key) -> int:
+        return len(self.lists.get(_encode(key), []))
+
+    def lrem(self, key, count: int, value) -> int:
+        # Only count 0, all occurrences are removed
+        values = self.lists.get(_encode(key), [])
+        self.lists[_encode(key)] = [item for item in values if item != _encode(value)]
+        if not self.lists[_encode(key)]:
+            del self.lists[_encode(key)]
+
+        return len(values) - len(self.lists.get(_encode(key), []))
+
+    def expire(self, key, seconds: int) -> bool:
+        return True
+
+    def hset(self, key, field=None, value=None, mapping: Optional[dict] = None) -> int:
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+
+        self.hashes[_encode(key)].update({_encode(field): _encode(value) for field, value in items.items()})
+        return len(items)
+
+    def hgetall(self, key) -> Dict[bytes, bytes]:
+        return dict(self.hashes.get(_encode(key), {}))
+
+    def xadd(self, key, fields: dict) -> bytes:
+        self._last_id += 1
+        entry_id = f"{self._last_id}-0".encode()
+
+        self.streams[_encode(key)].append((entry_id, {_encode(name): _encode(value) for name, value in fields.items()}))
+        return entry_id
+
+    def xgroup_create(self, key, group: str, id: str = '$', mkstream: bool = False) -> bool:
+        if (_encode(key), group) in self.groups:
+            raise redis.ResponseError("BUSYGROUP Consumer Group name already exists")
+
+        self.groups.add((_encode(key), group))
+        return True
+
+    def xreadgroup(self, group: str, consumer: str, streams: dict, count: Optional[int] = None) -> list:
+        (key, stream_id), = streams.items()
+        key = _encode(key)
+
+        if stream_id == '>':
+            entries = [entry for entry in self.streams[key] if entry[0] not in self.delivered][:count]
+            self.delivered.update(entry_id for entry_id, _ in entries)
+            self.pending.update(entry_id for entry_id, _ in entries)
+
+            return [[key, entries]] if entries else []
+
+        return [[key, [entry for entry in self.streams[key] if entry[0] in self.pending][:count]]]
+
+    def xack(self, key, group: str, *entry_ids: bytes) -> int:
+        acknowledged = self.pending.intersection(entry_ids)
+        self.pending.difference_update(acknowledged)
+
+        return len(acknowledged)
+
+    def xdel(self, key, *entry_ids: bytes) -> int:
+        key = _encode(key)
+        entries = self.streams[key]
+        self.streams[key] = [entry for entry in entries if entry[0] not in entry_ids]
+
+        return len(entries) - len(self.streams[key])
@@ -0,0 +1,70 @@
+from django.test import TestCase
+
+from web.catalog import PetCatalog
+from web.models import Dog, PetGender, PetSize, PetStatus, PetType, Shelter
+from web.tests.factories import CatFactory, DogFactory, ShelterFactory
+
+
+class PetCatalogTest(TestCase):
+
+    def setUp(self):
+        self.shelter = ShelterFactory()
+
+        self.small_puppy = DogFactory(shelter=self.shelter, age=1, size=PetSize.Small, gender=PetGender.Female)
+        self.large_dog = DogFactory(age=8, size=PetSize.Large, gender=PetGender.Male)
+        self.cat = CatFactory(age=3, gender=PetGender.Male)
+        self.taken_dog = DogFactory(status=PetStatus.TAKEN_NOT_VIA_GETPET)
+
+    def _sample(self, **kwargs):
+        return set(PetCatalog.current().sample(size=100, **kwargs))
+
+    def test_sample_by_pet_type(self):
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG), {self.small_puppy.pk, self.large_dog.pk})
+        self.assertSetEqual(self._sample(pet_type=PetType.CAT), {self.cat.pk})
+
+    def test_sample_filters(self):
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG, age_max=2), {self.small_puppy.pk})
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG, age_min=2), {self.large_dog.pk})
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG, pet_size=PetSize.Large), {self.large_dog.pk})
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG, gender=PetGender.Female), {self.small_puppy.pk})
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG, region_id=self.shelter.region_id),
+                            {self.small_puppy.pk})
+
+    def test_sample_excluded_pets(self):
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG, excluded_pet_ids=[self.small_puppy.pk]),
+                            {self.large_dog.pk})
+
+    def test_sample_size(self):
+        self.assertEqual(len(PetCatalog.current().sample(pet_type=PetType.DOG, size=1)), 1)
+
+    def test_catalog_is_reloaded_after_pet_save(self):
+        catalog = PetCatalog.current()
+
+        self.large_dog.status = PetStatus.TAKEN_NOT_VIA_GETPET
+        self.large_dog.save()
+
+        self.assertIsNot(PetCatalog.current(), catalog)
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG), {self.small_puppy.pk})
+
+    def test_catalog_is_reloaded_after_shelter_save(self):
+        self.shelter.is_published = False
+        self.shelter.save()
+
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG), {self.large_dog.pk})
+
+    def test_catalog_is_kept_after_save_of_other_fields(self):
+        catalog = PetCatalog.current()
+
+        self.large_dog.name = 'Reksas'
+        self.large_dog.save()
+        self.shelter.name = 'Prieglauda'
+        self.shelter.save()
+
+        self.assertIs(PetCatalog.current(), catalog)
+
+    def test_catalog_is_reloaded_after_queryset_update(self):
+        Dog.objects.filter(pk=self.large_dog.pk).update(status=PetStatus.TAKEN_NOT_VIA_GETPET)
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG), {self.small_puppy.pk})
+
+        Shelter.objects.filter(pk=self.shelter.pk).update(is_published=False)
+        self.assertSetEqual(self._sample(pet_type=PetType.DOG), set())
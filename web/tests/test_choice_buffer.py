@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+
+from web.choice_buffer import PetChoiceBuffer
+from web.models import UserPetChoice
+from web.tests.factories import DogFactory, UserFactory
+from web.tests.fake_redis import FakeRedis
+
+
+class PetChoiceBufferCoalesceTest(SimpleTestCase):
+
+    def test_last_choice_of_user_and_pet_wins(self):
+        entries = [
+            (b'1-0', {b'user': b'1', b'pet': b'10', b'is_favorite': b'1'}),
+            (b'1-1', {b'user': b'2', b'pet': b'10', b'is_favorite': b'0'}),
+            (b'1-2', {b'user': b'1', b'pet': b'10', b'is_favorite': b'0'}),
+            (b'1-3', {b'user': b'1', b'pet': b'11', b'is_favorite': b'1'}),
+        ]
+
+        self.assertDictEqual(PetChoiceBuffer.coalesce(entries), {
+            (1, 10): False,
+            (2, 10): False,
+            (1, 11): True,
+        })
+
+
+class PetChoiceBufferTest(TestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch('web.choice_buffer._redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = UserFactory()
+
+        self.dog1 = DogFactory()
+        self.dog2 = DogFactory()
+
+    def _user_choices(self):
+        return dict(UserPetChoice.objects.filter(user=self.user).values_list('pet_id', 'is_favorite'))
+
+    def test_later_choices_win(self):
+        PetChoiceBuffer.append(self.user.pk, self.dog1.pk, True)
+        PetChoiceBuffer.append_many(self.user.pk, {self.dog1.pk: False, self.dog2.pk: True})
+
+        self.assertDictEqual(PetChoiceBuffer.pending(self.user.pk), {self.dog1.pk: False, self.dog2.pk: True})
+
+        self.assertEqual(PetChoiceBuffer.flush(), 3)
+        self.assertDictEqual(self._user_choices(), {self.dog1.pk: False, self.dog2.pk: True})
+
+    def test_flush_redelivers_unacknowledged_entries(self):
+        PetChoiceBuffer.append(self.user.pk, self.dog1.pk, True)
+
+        with mock.patch.object(UserPetChoice, 'upsert_many', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                PetChoiceBuffer.flush()
+
+        PetChoiceBuffer.append(self.user.pk, self.dog2.pk, False)
+
+        self.assertEqual(PetChoiceBuffer.flush(), 2)
+        self.assertDictEqual(self._user_choices(), {self.dog1.pk: True, self.dog2.pk: False})
+        self.assertEqual(PetChoiceBuffer.flush(), 0)
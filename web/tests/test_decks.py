@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from web.decks import UserPetDeck
+from web.models import Dog, PetType, UserPetChoice
+from web.tests.factories import CatFactory, DogFactory, UserFactory
+from web.tests.fake_redis import FakeRedis
+
+
+@override_settings(USER_PET_DECKS=True)
+class UserPetDeckTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.redis = FakeRedis()
+        patcher = mock.patch('web.decks._redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = UserFactory()
+
+        self.dog1 = DogFactory()
+        self.dog2 = DogFactory()
+        self.cat = CatFactory()
+
+    def test_refill_excludes_chosen_pets(self):
+        UserPetChoice.objects.create(user=self.user, pet=self.dog1, is_favorite=True)
+
+        self.assertEqual(UserPetDeck.refill(self.user, PetType.DOG), 1)
+        self.assertListEqual(UserPetDeck.pop(self.user, PetType.DOG, 10), [self.dog2.pk])
+
+    def test_pop_without_deck_schedules_refill(self):
+        self.assertIsNone(UserPetDeck.pop(self.user, PetType.CAT, 10))
+
+        self.assertListEqual(UserPetDeck.pop(self.user, PetType.CAT, 10), [self.cat.pk])
+
+    def test_pop_removes_pets_from_deck(self):
+        UserPetDeck.refill(self.user, PetType.DOG)
+
+        pet_ids = UserPetDeck.pop(self.user, PetType.DOG, 1)
+        self.assertEqual(len(pet_ids), 1)
+
+        self.assertNotIn(pet_ids[0], UserPetDeck.pop(self.user, PetType.DOG, 10))
+
+    def test_remove_swiped_pet(self):
+        UserPetDeck.refill(self.user, PetType.DOG)
+
+        UserPetDeck.remove(self.user, self.dog1.pk)
+
+        self.assertListEqual(UserPetDeck.pop(self.user, PetType.DOG, 10), [self.dog2.pk])
+
+    def test_pets_popped_and_removed_during_refill_are_not_added_back(self):
+        dog3 = DogFactory()
+        UserPetDeck.refill(self.user, PetType.DOG)
+        generate_pets = Dog.generate_pets
+
+        def generate_pets_while_swiping(*args, **kwargs):
+            # Deck is drained and a popped pet swiped while refill generates pets
+            pets = generate_pets(*args, **{**kwargs, 'seen_pet_ids': []})
+            popped_pet_ids.extend(UserPetDeck.pop(self.user, PetType.DOG, 10))
+            UserPetDeck.remove(self.user, popped_pet_ids[0])
+            return pets
+
+        popped_pet_ids = []
+        with mock.patch.object(Dog, 'generate_pets', side_effect=generate_pets_while_swiping), \
+                mock.patch.object(UserPetDeck, '_schedule_refill'):
+            self.assertEqual(UserPetDeck.refill(self.user, PetType.DOG), 0)
+
+        self.assertSetEqual(set(popped_pet_ids), {self.dog1.pk, self.dog2.pk, dog3.pk})
+        with mock.patch.object(UserPetDeck, '_schedule_refill'):
+            self.assertIsNone(UserPetDeck.pop(self.user, PetType.DOG, 10))
+
+    def test_refill_lock_is_released_when_refill_fails(self):
+        lock_key = UserPetDeck._refill_lock_key(self.user.pk, PetType.DOG)
+        self.redis.set(lock_key, 1)
+
+        with mock.patch.object(Dog, 'generate_pets', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                UserPetDeck.refill(self.user, PetType.DOG)
+
+        self.assertIsNone(self.redis.get(lock_key))
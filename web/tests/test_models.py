@@ -1,8 +1,13 @@
+from datetime import timedelta
 from unittest.mock import MagicMock
 
-from django.test import SimpleTestCase
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase
 
-from web.models import Cat, Dog, PetGender, PetSize
+from utils.utils import django_now
+from web.models import Cat, Dog, DogProperty, PetChange, PetGender, PetSimilarity, PetSize, PetStatus, PetType, \
+    UserPetChoice
+from web.tests.factories import CatFactory, DogFactory, ShelterFactory, UserFactory
 
 
 class TestPetDescriptionIncludingAllInformationTestCase(SimpleTestCase):
@@ -228,3 +233,177 @@ Amputuota galūnė ir šlapimo nelaikymas.
         pet = self._create_dog(description=description, gender=PetGender.Female, desexed=False)
 
         self.assertEqual(pet.description_including_all_information(), expected_description)
+
+
+class PetFullDescriptionTest(TestCase):
+
+    def _stored_description(self, pet) -> str:
+        return Dog.objects.values_list('full_description', flat=True).get(pk=pet.pk)
+
+    def test_description_stored_on_save(self):
+        dog = DogFactory(description="Aprašymas", age=3)
+
+        self.assertEqual(self._stored_description(dog), dog.description_including_all_information())
+
+        dog.age = 5
+        dog.save(update_fields=['age'])
+
+        self.assertIn("5 m.", self._stored_description(dog))
+
+    def test_description_updated_with_properties(self):
+        dog = DogFactory()
+        playful = DogProperty.objects.create(name="Žaismingas")
+
+        dog.properties.add(playful)
+        self.assertIn("žaismingas", self._stored_description(dog))
+        self.assertTrue(PetChange.objects.filter(pet_id=dog.pk).exists())
+
+        playful.name = "Aktyvus"
+        playful.save()
+        self.assertIn("aktyvus", self._stored_description(dog))
+
+        dog.properties.clear()
+        self.assertNotIn("aktyvus", self._stored_description(dog))
+
+    def test_description_updated_when_property_deleted(self):
+        dog = DogFactory()
+        playful = DogProperty.objects.create(name="Žaismingas")
+        playful.dogs.add(dog)
+        self.assertIn("žaismingas", self._stored_description(dog))
+
+        playful.delete()
+
+        self.assertNotIn("žaismingas", self._stored_description(dog))
+
+
+class PetChangeRetentionTest(TestCase):
+
+    def test_expired_changes_are_deleted_except_the_latest(self):
+        PetChange.log([1, 2, 3])
+        PetChange.objects.update(created_at=django_now() - timedelta(days=31))
+        latest_change_id = PetChange.objects.order_by('id').last().pk
+
+        self.assertEqual(PetChange.delete_expired(retention_days=30), 2)
+        self.assertListEqual(list(PetChange.objects.values_list('id', flat=True)), [latest_change_id])
+
+        self.assertTrue(PetChange.is_expired_cursor(latest_change_id - 2))
+        self.assertFalse(PetChange.is_expired_cursor(latest_change_id - 1))
+
+
+class UserPetChoiceUpsertTest(TestCase):
+
+    def test_upsert_many(self):
+        user1, user2 = UserFactory(), UserFactory()
+        dog, cat = DogFactory(), CatFactory()
+        UserPetChoice.objects.create(user=user1, pet=dog, is_favorite=True)
+
+        saved = UserPetChoice.upsert_many({
+            (user1.pk, dog.pk): False,
+            (user2.pk, cat.pk): True,
+            (user2.pk, 0): True,
+            (0, dog.pk): True,
+        })
+
+        self.assertSetEqual(set(saved), {(user1.pk, dog.pk), (user2.pk, cat.pk)})
+        self.assertSetEqual(
+            set(UserPetChoice.objects.values_list('user_id', 'pet_id', 'is_favorite')),
+            {(user1.pk, dog.pk, False), (user2.pk, cat.pk, True)},
+        )
+
+
+class GeneratePetsTest(TestCase):
+
+    def setUp(self):
+        self.dogs = [DogFactory() for _ in range(5)]
+        self.taken_dog = DogFactory(status=PetStatus.TAKEN_NOT_VIA_GETPET)
+        self.unpublished_dog = DogFactory(shelter=ShelterFactory(is_published=False))
+        self.cat = CatFactory()
+
+    def test_generate_pets_returns_only_available_pets_of_type(self):
+        pets = Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], region=None, pet_type=PetType.DOG)
+
+        self.assertSetEqual({pet.pk for pet in pets}, {dog.pk for dog in self.dogs})
+
+    def test_generate_pets_without_relations(self):
+        pets = Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], region=None, pet_type=PetType.DOG,
+                                 load_relations=False)
+
+        self.assertSetEqual({pet.pk for pet in pets}, {dog.pk for dog in self.dogs})
+        for pet in pets:
+            self.assertNotIn('shelter', pet._state.fields_cache)
+            self.assertNotIn('profile_photos', getattr(pet, '_prefetched_objects_cache', {}))
+
+    def test_generate_pets_excludes_liked_and_disliked_pets(self):
+        pets = Dog.generate_pets(
+            liked_pet_ids=[self.dogs[0].pk],
+            disliked_pet_ids=[self.dogs[1].pk],
+            region=None,
+            pet_type=PetType.DOG
+        )
+
+        self.assertSetEqual({pet.pk for pet in pets}, {dog.pk for dog in self.dogs[2:]})
+
+    def test_random_sample_returns_distinct_pets(self):
+        pets = Dog.available.all().random_sample(3)
+
+        self.assertEqual(len({pet.pk for pet in pets}), 3)
+        self.assertTrue({pet.pk for pet in pets} <= {dog.pk for dog in self.dogs})
+
+    def test_random_sample_returns_all_pets_when_there_are_fewer(self):
+        pets = Dog.available.all().random_sample(10)
+
+        self.assertSetEqual({pet.pk for pet in pets}, {dog.pk for dog in self.dogs})
+
+    def test_generate_pets_size(self):
+        for _ in range(20):
+            pets = Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], region=None, pet_type=PetType.DOG,
+                                     size=3)
+
+            self.assertEqual(len(pets), 3)
+            self.assertEqual(len({pet.pk for pet in pets}), 3)
+
+    def test_generate_pets_filters(self):
+        old_dog = DogFactory(age=10_000)
+
+        pets = Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], region=None, pet_type=PetType.DOG,
+                                 age_min=10_000)
+
+        self.assertListEqual([pet.pk for pet in pets], [old_dog.pk])
+
+    def test_generate_recommended_pets(self):
+        PetSimilarity.objects.create(pet=self.dogs[0], similar_pet=self.dogs[3], score=0.5)
+        PetSimilarity.objects.create(pet=self.dogs[0], similar_pet=self.dogs[4], score=0.9)
+
+        pets = Dog.generate_pets(liked_pet_ids=[self.dogs[0].pk], disliked_pet_ids=[], region=None,
+                                 pet_type=PetType.DOG, recommended=True)
+
+        self.assertListEqual([pet.pk for pet in pets[:2]], [self.dogs[4].pk, self.dogs[3].pk])
+        self.assertSetEqual({pet.pk for pet in pets}, {dog.pk for dog in self.dogs[1:]})
+
+    def test_generate_pets_cats(self):
+        pets = Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], region=None, pet_type=PetType.CAT)
+
+        self.assertListEqual([pet.pk for pet in pets], [self.cat.pk])
+
+
+class GenerateNearbyPetsTest(TestCase):
+
+    def setUp(self):
+        self.vilnius = Point(25.279652, 54.687157, srid=4326)
+
+        self.vilnius_dog = DogFactory(shelter=ShelterFactory(location=Point(25.28, 54.69, srid=4326)))
+        self.kaunas_dog = DogFactory(shelter=ShelterFactory(location=Point(23.90, 54.90, srid=4326)))
+        self.klaipeda_dog = DogFactory(shelter=ShelterFactory(location=Point(21.14, 55.70, srid=4326)))
+
+    def test_generate_pets_within_distance(self):
+        pets = Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], region=None, pet_type=PetType.DOG,
+                                 location=self.vilnius, max_distance_km=120)
+
+        self.assertSetEqual({pet.pk for pet in pets}, {self.vilnius_dog.pk, self.kaunas_dog.pk})
+
+    def test_generate_pets_ranked_by_distance(self):
+        pets = Dog.generate_pets(liked_pet_ids=[], disliked_pet_ids=[], region=None, pet_type=PetType.DOG,
+                                 location=self.vilnius)
+
+        self.assertListEqual([pet.pk for pet in pets],
+                             [self.vilnius_dog.pk, self.kaunas_dog.pk, self.klaipeda_dog.pk])
@@ -0,0 +1,30 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from web.recommendations import co_like_similarities
+
+
+class CoLikeSimilaritiesTest(SimpleTestCase):
+
+    def test_no_likes(self):
+        self.assertListEqual(list(co_like_similarities(np.array([]), np.array([]), top_k=5)), [])
+
+    def test_similarities(self):
+        user_ids = np.array([1, 1, 2, 2, 3, 3, 3])
+        pet_ids = np.array([10, 11, 10, 11, 10, 12, 11])
+
+        similarities = {(pet_id, similar_pet_id): score
+                        for pet_id, similar_pet_id, score in co_like_similarities(user_ids, pet_ids, top_k=5)}
+
+        self.assertSetEqual(set(similarities.keys()), {(10, 11), (11, 10), (10, 12), (12, 10), (11, 12), (12, 11)})
+        self.assertAlmostEqual(similarities[(10, 11)], 1.0, places=5)
+        self.assertAlmostEqual(similarities[(12, 10)], 1 / np.sqrt(3), places=5)
+
+    def test_top_k(self):
+        user_ids = np.array([1, 1, 2, 2, 3, 3, 3])
+        pet_ids = np.array([10, 11, 10, 11, 10, 12, 11])
+
+        similarities = list(co_like_similarities(user_ids, pet_ids, top_k=1))
+
+        self.assertEqual(len(similarities), 3)
+        self.assertIn((10, 11), [(pet_id, similar_pet_id) for pet_id, similar_pet_id, _ in similarities])
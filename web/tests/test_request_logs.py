@@ -0,0 +1,39 @@
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from web.models import User
+from web.request_logs import APIRequestLogBuffer
+
+
+class APIRequestLogBufferRecordTest(SimpleTestCase):
+
+    def test_record_is_restored_as_request_log(self):
+        requested_at = timezone.now()
+
+        request_log = APIRequestLogBuffer.request_log(APIRequestLogBuffer.record({
+            'requested_at': requested_at,
+            'user': User(pk=5),
+            'path': '/api/v1/pets/',
+            'method': 'GET',
+            'query_params': {'page': '2'},
+            'data': None,
+            'response': None,
+            'response_ms': 12,
+            'status_code': 200,
+        }))
+
+        self.assertEqual(request_log.requested_at, requested_at)
+        self.assertEqual(request_log.user_id, 5)
+        self.assertEqual(request_log.path, '/api/v1/pets/')
+        self.assertEqual(request_log.query_params, "{'page': '2'}")
+        self.assertIsNone(request_log.data)
+        self.assertEqual(request_log.response_ms, 12)
+
+    def test_anonymous_user_is_not_recorded(self):
+        request_log = APIRequestLogBuffer.request_log(APIRequestLogBuffer.record({
+            'requested_at': timezone.now(),
+            'user': None,
+            'path': '/api/v1/pets/',
+        }))
+
+        self.assertIsNone(request_log.user_id)
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from web.models import UserPetChoice
+from web.seen_pets import SeenPetsFilter
+from web.tests.factories import DogFactory, UserFactory
+
+
+class SeenPetsFilterTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = UserFactory()
+
+        self.dog1 = DogFactory()
+        self.dog2 = DogFactory()
+
+    def test_filter_is_built_from_user_choices(self):
+        UserPetChoice.objects.create(user=self.user, pet=self.dog1, is_favorite=True)
+
+        seen_pets = SeenPetsFilter.for_user(self.user.pk)
+
+        self.assertIn(self.dog1.pk, seen_pets)
+        self.assertNotIn(self.dog2.pk, seen_pets)
+
+    def test_choice_save_updates_filter(self):
+        SeenPetsFilter.for_user(self.user.pk)
+
+        UserPetChoice.objects.create(user=self.user, pet=self.dog2, is_favorite=False)
+
+        self.assertIn(self.dog2.pk, SeenPetsFilter.for_user(self.user.pk))
+
+    def test_full_filter_is_rebuilt_bigger(self):
+        SeenPetsFilter.MIN_CAPACITY, min_capacity = 1, SeenPetsFilter.MIN_CAPACITY
+        self.addCleanup(setattr, SeenPetsFilter, 'MIN_CAPACITY', min_capacity)
+
+        SeenPetsFilter.for_user(self.user.pk)
+        UserPetChoice.objects.create(user=self.user, pet=self.dog1, is_favorite=True)
+        UserPetChoice.objects.create(user=self.user, pet=self.dog2, is_favorite=True)
+
+        seen_pets = SeenPetsFilter.for_user(self.user.pk)
+
+        self.assertEqual(seen_pets.capacity, 4)
+        self.assertTrue(seen_pets.contains_many([self.dog1.pk, self.dog2.pk]).all())
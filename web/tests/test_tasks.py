@@ -1,8 +1,17 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework_tracking.models import APIRequestLog
 
-from web.models import Pet, PetStatus, Shelter
-from web.tasks import randomize_pets_order, randomize_shelters_order
-from web.tests.factories import PetFactory, ShelterFactory
+from utils.utils import django_now
+from web.models import Pet, PetSimilarity, PetStatus, Shelter, UserPetChoice
+from web.request_logs import APIRequestLogPartitions
+from web.tasks import compute_pet_similarities, maintain_api_request_log_partitions, randomize_pets_order, \
+    randomize_pets_random_keys, randomize_shelters_order
+from web.tests.factories import PetFactory, ShelterFactory, UserFactory
 
 
 class RandomizePetOrderTest(TestCase):
@@ -27,6 +36,25 @@ class RandomizePetOrderTest(TestCase):
         self.assertEqual(self.pet3.updated_at, Pet.objects.get(pk=self.pet3.pk).updated_at)
 
 
+class RandomizePetsRandomKeysTest(TestCase):
+
+    def setUp(self):
+        self.pet1: Pet = PetFactory()
+        self.pet2: Pet = PetFactory()
+
+    def test_random_keys_are_updated(self):
+        random_keys = set(Pet.objects.values_list('random_key', flat=True))
+
+        self.assertEqual(randomize_pets_random_keys(), 2)
+        self.assertTrue(set(Pet.objects.values_list('random_key', flat=True)).isdisjoint(random_keys))
+
+    def test_updated_at_is_not_updated(self):
+        randomize_pets_random_keys()
+
+        self.assertEqual(self.pet1.updated_at, Pet.objects.get(pk=self.pet1.pk).updated_at)
+        self.assertEqual(self.pet2.updated_at, Pet.objects.get(pk=self.pet2.pk).updated_at)
+
+
 class RandomizeShelterOrderTest(TestCase):
 
     def setUp(self):
@@ -45,3 +73,101 @@ class RandomizeShelterOrderTest(TestCase):
 
         self.assertEqual(self.shelter1.updated_at, Shelter.objects.get(pk=self.shelter1.pk).updated_at)
         self.assertEqual(self.shelter2.updated_at, Shelter.objects.get(pk=self.shelter2.pk).updated_at)
+
+
+class ComputePetSimilaritiesTest(TestCase):
+
+    def setUp(self):
+        self.pet1 = PetFactory()
+        self.pet2 = PetFactory()
+        self.pet3 = PetFactory()
+
+        for user in [UserFactory(), UserFactory()]:
+            UserPetChoice.objects.create(user=user, pet=self.pet1, is_favorite=True)
+            UserPetChoice.objects.create(user=user, pet=self.pet2, is_favorite=True)
+            UserPetChoice.objects.create(user=user, pet=self.pet3, is_favorite=False)
+
+    def test_similarities_are_computed(self):
+        self.assertEqual(compute_pet_similarities(), 2)
+
+        similarities = set(PetSimilarity.objects.values_list('pet_id', 'similar_pet_id'))
+        self.assertSetEqual(similarities, {(self.pet1.pk, self.pet2.pk), (self.pet2.pk, self.pet1.pk)})
+
+    def test_similarities_are_replaced(self):
+        compute_pet_similarities()
+        UserPetChoice.objects.filter(pet=self.pet2).delete()
+
+        self.assertEqual(compute_pet_similarities(), 0)
+        self.assertFalse(PetSimilarity.objects.exists())
+
+
+class MaintainApiRequestLogPartitionsTest(TestCase):
+
+    def _partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = %s::regclass",
+                           [APIRequestLogPartitions.TABLE])
+            return {name for name, in cursor.fetchall()}
+
+    def test_partitions_are_created_ahead(self):
+        maintain_api_request_log_partitions()
+
+        self.assertIn(APIRequestLogPartitions.partition_name(django_now().date() + timedelta(days=7)),
+                      self._partitions())
+
+    def test_expired_partitions_are_dropped(self):
+        maintain_api_request_log_partitions()
+        today = django_now().date()
+
+        with mock.patch('web.request_logs.django_now', return_value=django_now() + timedelta(days=40)):
+            result = maintain_api_request_log_partitions()
+
+        self.assertIn(APIRequestLogPartitions.LEGACY_PARTITION, result['dropped'])
+        self.assertIn(APIRequestLogPartitions.partition_name(today + timedelta(days=7)), result['dropped'])
+
+        partitions = self._partitions()
+        self.assertNotIn(APIRequestLogPartitions.LEGACY_PARTITION, partitions)
+        self.assertIn(APIRequestLogPartitions.partition_name(today + timedelta(days=41)), partitions)
+        self.assertIn(APIRequestLogPartitions.DEFAULT_PARTITION, partitions)
+
+    def _create_log(self, requested_at):
+        APIRequestLog.objects.create(requested_at=requested_at, path='/api/v1/pets/', remote_addr='127.0.0.1',
+                                     host='localhost', method='GET')
+
+    def _count_logs(self, partition):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {partition}")
+            return cursor.fetchone()[0]
+
+    def test_logs_are_moved_from_default_partition(self):
+        requested_at = timezone.now() + timedelta(days=20)
+        self._create_log(requested_at)
+        self.assertEqual(self._count_logs(APIRequestLogPartitions.DEFAULT_PARTITION), 1)
+
+        maintain_api_request_log_partitions()
+
+        self.assertEqual(self._count_logs(APIRequestLogPartitions.DEFAULT_PARTITION), 0)
+        self.assertEqual(self._count_logs(APIRequestLogPartitions.partition_name(requested_at.date())), 1)
+
+    def test_missed_days_are_caught_up_and_expired_logs_deleted_from_default_partition(self):
+        maintain_api_request_log_partitions()
+        self._create_log(timezone.now() + timedelta(days=35))
+        today = django_now().date()
+
+        with mock.patch('web.request_logs.django_now', return_value=django_now() + timedelta(days=80)):
+            result = maintain_api_request_log_partitions()
+
+        self.assertIn(APIRequestLogPartitions.partition_name(today + timedelta(days=80)), result['created'])
+        self.assertIn(APIRequestLogPartitions.partition_name(today + timedelta(days=110)), result['created'])
+        self.assertEqual(self._count_logs(APIRequestLogPartitions.DEFAULT_PARTITION), 0)
+
+    def test_logs_are_saved_to_partition_of_request_day(self):
+        maintain_api_request_log_partitions()
+        requested_at = timezone.now() + timedelta(days=1)
+
+        APIRequestLog.objects.create(requested_at=requested_at, path='/api/v1/pets/', remote_addr='127.0.0.1',
+                                     host='localhost', method='GET')
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {APIRequestLogPartitions.partition_name(requested_at.date())}")
+            self.assertEqual(cursor.fetchone()[0], 1)